@@ -0,0 +1,96 @@
+"""Cycle detection for long-running simulations
+
+States are compared through compact fingerprints of their serialised form, so
+detecting a loop never needs to keep (or compare) whole snapshots around.
+"""
+from dataclasses import dataclass
+import hashlib
+from typing import Callable, Generic, TypeVar
+
+
+State = TypeVar("State")
+
+Step = Callable[[State], State]
+Key = Callable[[State], bytes]
+
+
+def fingerprint(data: bytes) -> bytes:
+    """Returns a compact hash of the serialised state"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@dataclass
+class Cycle(Generic[State]):
+    """States of a simulation, which loops every period steps after prefix steps"""
+
+    step: Step[State]
+    states: list[State]  # States after 0, 1, 2, ... steps
+    prefix: int = 0
+    period: int = 0  # 0 if no loop was found
+
+    def reduce(self, steps: int) -> int:
+        """Returns the fewest steps leading to the same state as the given steps"""
+        if self.period and steps >= self.prefix:
+            return self.prefix + (steps - self.prefix) % self.period
+        return steps
+
+    def state_after(self, steps: int) -> State:
+        """Returns the state after the given number of steps"""
+        steps = self.reduce(steps)
+        if steps < len(self.states):
+            return self.states[steps]
+        # Simulate the missing steps from the last known state
+        state = self.states[-1]
+        for _ in range(steps - len(self.states) + 1):
+            state = self.step(state)
+        return state
+
+
+def find_cycle(
+    start: State, step: Step[State], key: Key[State], max_steps: int | None = None
+) -> Cycle[State]:
+    """
+    Simulates until a state repeats (or for at most max_steps steps), indexing the
+    states by fingerprint. Keeps the states up to the repeat, which are all the
+    states needed to answer any number of steps.
+    """
+    seen = {fingerprint(key(start)): 0}
+    states = [start]
+    while max_steps is None or len(states) <= max_steps:
+        state = step(states[-1])
+        state_print = fingerprint(key(state))
+        if state_print in seen:
+            prefix = seen[state_print]
+            return Cycle(step, states, prefix, len(states) - prefix)
+        seen[state_print] = len(states)
+        states.append(state)
+    return Cycle(step, states)
+
+
+def find_cycle_brent(start: State, step: Step[State], key: Key[State]) -> Cycle[State]:
+    """
+    Finds the loop with Brent's algorithm, in constant memory: only the start
+    state is kept, and later states are simulated again when asked for.
+    """
+    # Find the period, by comparing the hare to the tortoise, which teleports
+    # to the hare every power of two steps
+    power = period = 1
+    tortoise = fingerprint(key(start))
+    hare = step(start)
+    while tortoise != (hare_print := fingerprint(key(hare))):
+        if power == period:
+            tortoise = hare_print
+            power *= 2
+            period = 0
+        hare = step(hare)
+        period += 1
+
+    # Find the prefix, with the hare a whole period ahead of the tortoise
+    behind, ahead = start, start
+    for _ in range(period):
+        ahead = step(ahead)
+    prefix = 0
+    while fingerprint(key(behind)) != fingerprint(key(ahead)):
+        behind, ahead = step(behind), step(ahead)
+        prefix += 1
+    return Cycle(step, [start], prefix, period)
@@ -1,42 +1,100 @@
 """Day 1: Trebuchet?!"""
-import regex as re
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Self
 
+from loader import iter_byte_lines
+from timing import span
 
-def main() -> None:
+
+DIGIT_NAMES = [
+    b"one",
+    b"two",
+    b"three",
+    b"four",
+    b"five",
+    b"six",
+    b"seven",
+    b"eight",
+    b"nine",
+]
+
+
+@dataclass
+class DigitAutomaton:
+    """Aho-Corasick automaton matching digits and digit names, byte by byte"""
+
+    table: list[int]  # Next state, indexed by 256 * state + byte
+    values: list[int]  # Digit matched when entering each state, or -1
+
+    @classmethod
+    def from_names(cls, names: list[bytes]) -> Self:
+        """Builds the automaton for the given (ordered) digit names"""
+        patterns = [(str(digit).encode(), digit) for digit in range(10)]
+        patterns += [(name, digit) for digit, name in enumerate(names, 1)]
+
+        # Trie of the patterns
+        children: list[dict[int, int]] = [{}]
+        values = [-1]
+        for pattern, digit in patterns:
+            state = 0
+            for byte in pattern:
+                if byte not in children[state]:
+                    children[state][byte] = len(children)
+                    children.append({})
+                    values.append(-1)
+                state = children[state][byte]
+            values[state] = digit
+
+        # Fill in the missing transitions through the failure links (BFS order)
+        table = [0] * (256 * len(children))
+        fail = [0] * len(children)
+        queue: deque[int] = deque()
+        for byte in range(256):
+            table[byte] = children[0].get(byte, 0)
+            if table[byte]:
+                queue.append(table[byte])
+        while queue:
+            state = queue.popleft()
+            for byte in range(256):
+                fallback = table[256 * fail[state] + byte]
+                if (child := children[state].get(byte)) is None:
+                    table[256 * state + byte] = fallback
+                    continue
+                table[256 * state + byte] = child
+                fail[child] = fallback
+                if values[child] == -1:
+                    values[child] = values[fallback]
+                queue.append(child)
+        return cls(table, values)
+
+    def first_digit(self, data: Iterable[int]) -> int:
+        """Returns the first digit matched in the byte sequence"""
+        table, values = self.table, self.values
+        state = 0
+        for byte in data:
+            state = table[256 * state + byte]
+            if values[state] != -1:
+                return values[state]
+        raise ValueError("No digit found")
+
+
+# The last digit is the first one found scanning backwards, with reversed names
+FORWARD = DigitAutomaton.from_names(DIGIT_NAMES)
+BACKWARD = DigitAutomaton.from_names([name[::-1] for name in DIGIT_NAMES])
+
+
+def calibration_value(line: bytes) -> int:
+    """Combines the first and last digits of the line"""
+    return 10 * FORWARD.first_digit(line) + BACKWARD.first_digit(reversed(line))
+
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    digit_names = [
-        "one",
-        "two",
-        "three",
-        "four",
-        "five",
-        "six",
-        "seven",
-        "eight",
-        "nine",
-    ]
-
-    digits = [
-        re.findall(rf"(\d|{' | '.join(digit_names)})", line, overlapped=True)
-        for line in lines
-    ]
-
-    def convert_to_digit(s: str) -> int:
-        if len(s) == 1:
-            return int(s)
-        return digit_names.index(s) + 1
-
-    calibration_values = [
-        10 * convert_to_digit(digit[0]) + convert_to_digit(digit[-1])
-        for digit in digits
-    ]
-
-    print(*enumerate(zip(digits, calibration_values), 1), sep="\n")
-
-    print(sum(calibration_values))
+    with span("part2"):
+        calibration_sum = sum(map(calibration_value, iter_byte_lines(filename)))
+
+    print(calibration_sum)
 
 
 if __name__ == "__main__":
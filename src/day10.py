@@ -1,6 +1,7 @@
 """Day 10: Pipe Maze"""
-from shapely import Polygon  # type: ignore
+from typing import NamedTuple
 
+from timing import span, timed
 
 Position = tuple[int, int]
 
@@ -19,34 +20,47 @@ def find_first_adjacent_pipe(position: Position, lines: list[str]) -> Position:
     return x, y
 
 
-def calculate_path(start: Position, lines: list[str]) -> list[Position]:
-    """Calculates the loop path"""
+# Direction the loop leaves each pipe in, by the direction it entered it in
+TURNS: dict[tuple[str, Position], Position] = {
+    ("|", (0, 1)): (0, 1),
+    ("|", (0, -1)): (0, -1),
+    ("-", (1, 0)): (1, 0),
+    ("-", (-1, 0)): (-1, 0),
+    ("L", (0, 1)): (1, 0),
+    ("L", (-1, 0)): (0, -1),
+    ("J", (0, 1)): (-1, 0),
+    ("J", (1, 0)): (0, -1),
+    ("7", (0, -1)): (-1, 0),
+    ("7", (1, 0)): (0, 1),
+    ("F", (0, -1)): (1, 0),
+    ("F", (-1, 0)): (0, 1),
+}
+
+
+class Loop(NamedTuple):
+    """Loop summary: its length and (twice) the area it encloses"""
+
+    length: int
+    double_area: int
+
+
+@timed()
+def calculate_path(start: Position, lines: list[str]) -> Loop:
+    """Walks the loop, accumulating its length and shoelace sum along the way"""
     prev_x, prev_y = start
     curr_x, curr_y = find_first_adjacent_pipe(start, lines)
-    path: list[Position] = []
+    direction = curr_x - prev_x, curr_y - prev_y
+    length, double_area = 0, 0
     while True:
-        temp = curr_x, curr_y
-        path.append(temp)
-        match lines[curr_y][curr_x]:
-            case "S":
-                break
-            case "|":
-                curr_y += 1 if curr_y > prev_y else -1
-            case "-":
-                curr_x += 1 if curr_x > prev_x else -1
-            case char:
-                if curr_y == prev_y:
-                    if char in "LJ":
-                        curr_y -= 1
-                    else:
-                        curr_y += 1
-                else:
-                    if char in "J7":
-                        curr_x -= 1
-                    else:
-                        curr_x += 1
-        prev_x, prev_y = temp
-    return path
+        length += 1
+        double_area += prev_x * curr_y - curr_x * prev_y
+        char = lines[curr_y][curr_x]
+        if char == "S":
+            break
+        direction = TURNS[char, direction]
+        prev_x, prev_y = curr_x, curr_y
+        curr_x, curr_y = curr_x + direction[0], curr_y + direction[1]
+    return Loop(length, abs(double_area))
 
 
 def find_start(lines: list[str]) -> Position:
@@ -58,27 +72,31 @@ def find_start(lines: list[str]) -> Position:
     return x, y
 
 
-def get_count_inside(polygon: Polygon) -> int:
-    """Get count inside"""
-    return int(polygon.area - polygon.length // 2 + 1)
+def get_count_inside(loop: Loop) -> int:
+    """Get count inside, by Pick's theorem"""
+    return (loop.double_area - loop.length) // 2 + 1
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     "Main function"
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    with span("parse"):
+        with open(filename, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+        lines = [line.strip() for line in lines]
 
-    lines = [line.strip() for line in lines]
+        start = find_start(lines)
 
-    start = find_start(lines)
     print(f"Start = {start}")
 
-    path = calculate_path(start, lines)
-    print("Loop length:", len(path))
-    print("Farthest:", len(path) // 2)
+    with span("part1"):
+        loop = calculate_path(start, lines)
+    print("Loop length:", loop.length)
+    print("Farthest:", loop.length // 2)
 
-    polygon = Polygon(path)  # type: ignore
-    print("Count:", get_count_inside(polygon))  # type: ignore
+    with span("part2"):
+        count_inside = get_count_inside(loop)
+    print("Count:", count_inside)
 
 
 if __name__ == "__main__":
@@ -1,61 +1,65 @@
 """Day 11: Cosmic Expansion"""
-from dataclasses import dataclass
-from itertools import combinations
+from typing import NamedTuple
 import numpy as np
+import numpy.typing as npy
 
+from loader import Buffer, map_input
+from timing import span
 
-@dataclass
-class Space:
-    "Empty Space class"
-    empty_rows: list[int]
-    empty_cols: list[int]
-    expansion_rate: int = 2
+Coordinates = npy.NDArray[np.intp]
 
 
-Position = tuple[int, int]
+class DistanceSums(NamedTuple):
+    """Sum of the distances between every pair of galaxies, split by expansion"""
 
+    base: int  # Sum of the distances before expansion
+    empty: int  # Number of empty rows and columns crossed, over all pairs
 
-def calculate_path_length(galaxy1: Position, galaxy2: Position, space: Space) -> int:
-    """Calculates the length of the path between two galaxies, given the space they reside in"""
-    x_min, x_max = min(galaxy1[0], galaxy2[0]), max(galaxy1[0], galaxy2[0])
-    y_min, y_max = min(galaxy1[1], galaxy2[1]), max(galaxy1[1], galaxy2[1])
+    def at_rate(self, expansion_rate: int) -> int:
+        """Returns the sum of distances once each empty row or column is expanded"""
+        return self.base + (expansion_rate - 1) * self.empty
 
-    no_rows_between = sum(x_min < row < x_max for row in space.empty_rows)
-    no_cols_between = sum(y_min < col < y_max for col in space.empty_cols)
 
-    x_max += no_rows_between * (space.expansion_rate - 1)
-    y_max += no_cols_between * (space.expansion_rate - 1)
+def locate_galaxies(data: Buffer) -> tuple[Coordinates, Coordinates]:
+    """Returns the rows and columns of the galaxies, without building the image"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    width = data.find(b"\n") + 1 or len(buffer) + 1  # Including the newline
+    return np.divmod(np.flatnonzero(buffer == ord("#")), width)
 
-    diff_x = x_max - x_min
-    diff_y = y_max - y_min
 
-    if x_min == x_max:
-        return diff_y
-    if y_min == y_max:
-        return diff_x
-    return diff_x + diff_y
+def pairwise_sum(values: Coordinates) -> int:
+    """Sums the differences between every pair of the (sorted) values"""
+    # The i-th smallest value is subtracted from the larger values and vice-versa
+    weights = 2 * np.arange(len(values)) - len(values) + 1
+    return int(values @ weights)
 
 
-def main() -> None:
-    """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    lines = [list(line.strip()) for line in lines]
-    space = np.array(lines)
+def axis_sums(coordinates: Coordinates) -> DistanceSums:
+    """Returns the distance sums along one axis"""
+    coordinates = np.sort(coordinates)
+    is_empty = np.bincount(coordinates) == 0
+    empty_before = np.cumsum(is_empty)[coordinates]
+    return DistanceSums(pairwise_sum(coordinates), pairwise_sum(empty_before))
 
-    galaxies = list(zip(*np.where(space == "#")))
-    pairs_of_galaxies = combinations(galaxies, 2)
 
-    empty_rows = [i for i, row in enumerate(space) if np.all(row == ".")]
-    empty_cols = [i for i, col in enumerate(space.T) if np.all(col == ".")]
-    space = Space(empty_rows, empty_cols, expansion_rate=1_000_000)
-
-    path_length_sum = sum(
-        calculate_path_length(*pair_of_galaxies, space)
-        for pair_of_galaxies in pairs_of_galaxies
-    )
-    print("Sum:", path_length_sum)
+def main(filename: str = "input.txt") -> None:
+    """Main function"""
+    with span("parse"), map_input(filename) as data:
+        rows, cols = locate_galaxies(data)
+
+    with span("precompute"):
+        row_sums, col_sums = axis_sums(rows), axis_sums(cols)
+        sums = DistanceSums(
+            row_sums.base + col_sums.base, row_sums.empty + col_sums.empty
+        )
+
+    with span("part1"):
+        path_length_sum = sums.at_rate(2)
+    print("Sum (Part 1):", path_length_sum)
+
+    with span("part2"):
+        path_length_sum = sums.at_rate(1_000_000)
+    print("Sum (Part 2):", path_length_sum)
 
 
 if __name__ == "__main__":
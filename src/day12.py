@@ -1,51 +1,126 @@
 """Day 12: Hot Springs"""
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from itertools import product
+import os
 
+from loader import iter_lines
+from timing import span, timed
 
-def get_arrangement_count(row: str, groups: list[int]):
+Record = tuple[str, tuple[int, ...]]  # Springs and sizes of the damaged groups
+
+CACHE_SIZE = 1 << 16
+
+
+def parse_record(line: str) -> Record:
+    """Parses a row of springs and its damaged groups"""
+    springs, groups = line.split()
+    return springs, tuple(map(int, groups.split(",")))
+
+
+def unfold(record: Record, factor: int = 5) -> Record:
+    """Repeats the springs (joined by unknown springs) and the groups"""
+    springs, groups = record
+    return "?".join(factor * [springs]), factor * groups
+
+
+def count_arrangements(springs: str, groups: tuple[int, ...]) -> int:
     """Computes the number of possible arrangements"""
-    group_count = len(groups)
-    arrangements: dict[tuple[int, int], int] = {}
-    arrangements[0, 0] = 1
-
-    def is_valid(group_index: int, current_group_size: int, strict: bool = True):
-        if group_index >= len(groups):
-            return False
-        if strict:
-            return current_group_size == groups[group_index]
-        return current_group_size <= groups[group_index]
-
-    for char in row:
-        new_arrangements: defaultdict[tuple[int, int], int] = defaultdict(int)
-        for (group_index, current_group_size), count in arrangements.items():
-            valid = True
-            if char == "#":
-                current_group_size += 1
-                valid = is_valid(group_index, current_group_size, False)
-            elif char == "?":
-                if current_group_size <= 0:
-                    new_arrangements[group_index, current_group_size] += count
-                elif is_valid(group_index, current_group_size):
-                    new_arrangements[group_index + 1, 0] += count
-                valid2 = is_valid(group_index, current_group_size + 1, False)
-                new_arrangements[group_index, current_group_size + 1] += count * valid2
-                continue
-            elif current_group_size > 0:
-                valid = is_valid(group_index, current_group_size)
-                current_group_size = 0
-                group_index += 1
-            new_arrangements[group_index, current_group_size] += count * valid
-        arrangements = new_arrangements
-
-    total_count = 0
-    for (group_index, current_group_size), count in arrangements.items():
-        if group_index < len(groups) and current_group_size == groups[group_index]:
-            group_index += 1
-        elif current_group_size > 0:
-            continue
-        total_count += count * (group_index == group_count)
-    return total_count
+    return count_blocks(normalise(springs), tuple(groups))
+
+
+def normalise(springs: str) -> str:
+    """Drops the operational springs that do not separate damaged ones"""
+    return ".".join(filter(None, springs.split(".")))
+
+
+def count_blocks(springs: str, groups: tuple[int, ...]) -> int:
+    """
+    Computes the number of possible arrangements, a block of possibly damaged
+    springs at a time: each block holds the next few groups, counted by the
+    (cached) arrangements of those groups within the block alone
+    """
+    # Springs needed by the groups from each group on
+    needed = [-1] * (len(groups) + 1)
+    for i in range(len(groups) - 1, -1, -1):
+        needed[i] = needed[i + 1] + groups[i] + 1
+
+    # ways[i]: number of arrangements of the first i groups in the blocks so far
+    ways = {0: 1}
+    left = len(springs)  # Springs after the current block
+    for block in springs.split(".") if springs else []:
+        left -= len(block) + 1
+        placed: dict[int, int] = {}
+        for first, count in ways.items():
+            room = -1  # Springs needed by the groups in the block
+            for last in range(first, len(groups) + 1):
+                if last > first:
+                    room += groups[last - 1] + 1
+                    if room > len(block):
+                        break
+                if needed[last] > left:
+                    continue
+                if block_ways := count_normalised(block, groups[first:last]):
+                    placed[last] = placed.get(last, 0) + count * block_ways
+        ways = placed
+    return ways.get(len(groups), 0)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def count_normalised(springs: str, groups: tuple[int, ...]) -> int:
+    """Computes the number of possible arrangements, placing a whole group per step"""
+    length = len(springs)
+    # Length of the run of possibly damaged springs starting at each position
+    runs = [0] * (length + 1)
+    for i in range(length - 1, -1, -1):
+        runs[i] = runs[i + 1] + 1 if springs[i] != "." else 0
+
+    # ways[i]: number of arrangements of the groups placed so far in springs[i:],
+    # starting with no groups at all, where no damaged spring may be left
+    last_damaged = springs.rfind("#")
+    ways = [int(i > last_damaged) for i in range(length + 1)]
+    # Positions where each group can start, given the room the others need
+    lowest = sum(groups) + len(groups) - 1
+    highest = length
+    for size in reversed(groups):
+        lowest -= size
+        highest -= size
+        placed = [0] * (length + 1)
+        for i in range(highest, lowest - 1, -1):
+            # Either the group starts later (past an operational spring)...
+            if springs[i] != "#":
+                placed[i] = placed[i + 1]
+            # ... or here, if it fits and is not followed by a damaged spring
+            end = i + size
+            if runs[i] >= size and (end == length or springs[end] != "#"):
+                placed[i] += ways[min(end + 1, length)]
+        ways = placed
+        lowest -= 1
+        highest -= 1
+    return ways[0]
+
+
+def count_unfolded(record: Record, factor: int = 5) -> int:
+    """Computes the number of possible arrangements of the unfolded record"""
+    return count_arrangements(*unfold(record, factor))
+
+
+@timed()
+def count_all(records: list[Record], factor: int = 5, jobs: int = 0) -> list[int]:
+    """
+    Computes the number of possible arrangements of every unfolded record,
+    across jobs worker processes (1 counts in this process, 0 uses every core)
+    """
+    count = partial(count_unfolded, factor=factor)
+    # Every call starts cold, so that repeated runs measure the same work
+    count_normalised.cache_clear()
+    if jobs == 1:
+        return list(map(count, records))
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Large chunks, so that each worker's cache sees many rows
+        chunksize = -(-len(records) // (4 * workers)) or 1
+        return list(executor.map(count, records, chunksize=chunksize))
 
 
 def get_arrangement_count_naive(springs: str, groups: list[int]) -> int:
@@ -66,22 +141,18 @@ def get_arrangement_count_naive(springs: str, groups: list[int]) -> int:
     return count
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    sum_arrangements = 0
-    for line in lines:
-        springs, groups = line.split()
-        groups = list(map(int, groups.split(",")))
-
-        springs = "?".join(5 * [springs])
-        groups = 5 * groups
+    with span("parse"):
+        records = list(map(parse_record, iter_lines(filename)))
 
-        sum_arrangements += get_arrangement_count(springs, groups)
+    with span("part1"):
+        sum_arrangements = sum(count_all(records, factor=1, jobs=1))
+    print("Sum (Part 1):", sum_arrangements)
 
-    print("Sum:", sum_arrangements)
+    with span("part2"):
+        sum_arrangements = sum(count_all(records, factor=5))
+    print("Sum (Part 2):", sum_arrangements)
 
 
 if __name__ == "__main__":
@@ -1,84 +1,152 @@
 """Day 13: Point of Incidence"""
-from itertools import groupby
-from typing import Any
+from typing import NamedTuple
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 import numpy.typing as npy
 
+from loader import Buffer, map_input
+from timing import span, timed
 
-def find_reflection_line(pattern: npy.NDArray[Any], dims: int) -> int:
-    """Finds reflection line and returns the number of rows above it"""
-    max_smudges = 1
-    # Check for identical rows
-    midpoint = dims // 2
-    left_side = midpoint
-    right_side = midpoint
-
-    def check_side(curr_idx: int, diff: int) -> int:
-        if diff > max_smudges:
-            return 0
-        smudge_found = diff == max_smudges
-        j = 1
-        left = curr_idx - 1
-        right = curr_idx + 2
-        while left >= 0 and right < dims:
-            diff = np.count_nonzero(pattern[left] != pattern[right])
-            if smudge_found:
-                if diff != 0:
-                    smudge_found = False
-                    break
-            else:
-                if diff > max_smudges:
-                    break
-                if diff == max_smudges:
-                    smudge_found = True
-            j += 1
-            left = curr_idx - j
-            right = curr_idx + j + 1
-        else:
-            if smudge_found:
-                return curr_idx + 1
-        return 0
-
-    while left_side >= 0 or right_side < dims:
-        count = 0
-        if left_side >= 0:
-            diff = np.count_nonzero(pattern[left_side] != pattern[left_side + 1])
-            count = check_side(left_side, diff)
-        if count == 0 and right_side < dims - 1:
-            diff = np.count_nonzero(pattern[right_side] != pattern[right_side + 1])
-            count = check_side(right_side, diff)
-        if count != 0:
-            return count
-        left_side -= 1
-        right_side += 1
-    return 0
-
-
-def main() -> None:
+
+# Number of bits set in every byte
+POPCOUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+class Masks(NamedTuple):
+    """
+    Rows of every pattern as bitmasks, padded with zeros to the longest pattern,
+    each split into as many 64-bit words as the widest pattern needs
+    """
+
+    masks: npy.NDArray[np.uint64]  # By pattern, row and word
+    lengths: npy.NDArray[np.intp]
+
+
+def split_patterns(
+    line_lengths: npy.NDArray[np.intp],
+) -> tuple[npy.NDArray[np.intp], npy.NDArray[np.intp]]:
+    """
+    Returns the first line and the height of every pattern, given that patterns
+    are separated by blank lines
+    """
+    is_row = line_lengths > 0
+    is_first_row = is_row.copy()
+    is_first_row[1:] &= ~is_row[:-1]
+    pattern_of_line = np.cumsum(is_first_row) - 1
+    heights = np.bincount(
+        pattern_of_line[is_row], minlength=np.count_nonzero(is_first_row)
+    )
+    return np.flatnonzero(is_first_row), heights
+
+
+def pack_lines(rocks: npy.NDArray[np.bool_], words: int) -> npy.NDArray[np.uint64]:
+    """Packs the rocks along the last axis into the given number of 64-bit words"""
+    padded = np.zeros(rocks.shape[:-1] + (64 * words,), dtype=np.bool_)
+    padded[..., : rocks.shape[-1]] = rocks
+    return np.packbits(padded, axis=-1).view(np.uint64)
+
+
+def read_rocks(
+    buffer: npy.NDArray[np.uint8], starts: npy.NDArray[np.intp], shape: tuple[int, int]
+) -> npy.NDArray[np.bool_]:
+    """Returns the rocks of the patterns of the given shape starting at each start"""
+    height, width = shape
+    # Every height x width block of the input, by the byte it starts at
+    extent = (height - 1) * (width + 1) + width
+    blocks = as_strided(
+        buffer,
+        shape=(len(buffer) - extent + 1, height, width),
+        strides=(1, width + 1, 1),
+        writeable=False,
+    )
+    return blocks[starts] == ord("#")
+
+
+def empty_masks(lengths: npy.NDArray[np.intp], bits: int) -> Masks:
+    """Returns blank masks for lines of the given number of bits"""
+    words = max(bits - 1, 0) // 64 + 1
+    masks = np.zeros((len(lengths), np.max(lengths, initial=0), words), np.uint64)
+    return Masks(masks, lengths)
+
+
+def parse_patterns(data: Buffer) -> tuple[Masks, Masks]:
+    """
+    Encodes the rows and the columns of every pattern as bitmasks, with a bit set
+    for each rock. Patterns of the same shape are packed together, straight from
+    a strided view of the input.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if len(buffer) and buffer[-1] != ord("\n"):
+        buffer = np.append(buffer, np.uint8(ord("\n")))
+    line_ends = np.flatnonzero(buffer == ord("\n"))
+    line_starts = line_ends - np.diff(line_ends, prepend=-1) + 1
+
+    first_lines, heights = split_patterns(line_ends - line_starts)
+    starts = line_starts[first_lines]
+    widths = line_ends[first_lines] - starts
+
+    rows = empty_masks(heights, int(np.max(widths, initial=0)))
+    cols = empty_masks(widths, int(np.max(heights, initial=0)))
+    for height, width in set(zip(heights.tolist(), widths.tolist())):
+        group = np.flatnonzero((heights == height) & (widths == width))
+        rocks = read_rocks(buffer, starts[group], (height, width))
+        rows.masks[group, :height] = pack_lines(rocks, rows.masks.shape[2])
+        cols.masks[group, :width] = pack_lines(
+            rocks.transpose(0, 2, 1), cols.masks.shape[2]
+        )
+    return rows, cols
+
+
+def popcount(words: npy.NDArray[np.uint64]) -> npy.NDArray[np.int64]:
+    """Counts the bits set in every row of words"""
+    return POPCOUNTS[np.ascontiguousarray(words).view(np.uint8)].sum(axis=1)
+
+
+@timed()
+def find_reflection_lines(rows: Masks, smudges: int = 0) -> npy.NDArray[np.intp]:
+    """
+    Finds the reflection line of every pattern at once, i.e. the first line
+    across which exactly `smudges` rocks do not match, and returns the number
+    of rows above it (0 if there is no such line)
+    """
+    masks, lengths = rows
+    found = np.zeros(len(lengths), dtype=np.intp)
+    for line in range(1, masks.shape[1]):
+        candidates = np.flatnonzero(lengths > line)
+        mismatches = np.zeros(len(candidates), dtype=np.int64)
+        for offset in range(min(line, masks.shape[1] - line)):
+            above, below = line - 1 - offset, line + offset
+            differences = popcount(masks[candidates, above] ^ masks[candidates, below])
+            mismatches += differences * (lengths[candidates] > below)
+            # Drop the candidates as soon as they have too many mismatches
+            within_budget = mismatches <= smudges
+            candidates = candidates[within_budget]
+            mismatches = mismatches[within_budget]
+        candidates = candidates[(mismatches == smudges) & (found[candidates] == 0)]
+        found[candidates] = line
+    return found
+
+
+def summarize(rows: Masks, cols: Masks, smudges: int = 0) -> int:
+    """Summarizes the reflection lines of every pattern"""
+    rows_above = find_reflection_lines(rows, smudges)
+    cols_left = find_reflection_lines(cols, smudges)
+    # Columns are only counted for patterns without a horizontal line
+    return int(100 * rows_above.sum() + cols_left[rows_above == 0].sum())
+
+
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    patterns = [list(line.strip()) for line in lines]
-    patterns = [
-        np.array(list(group))
-        for key, group in groupby(patterns, lambda x: not x)
-        if not key
-    ]
-
-    summary = 0
-    for pattern in patterns:
-        n_rows, n_cols = pattern.shape
-        # Check for identical rows
-        count = find_reflection_line(pattern, n_rows)
-        summary += 100 * count
-        if count != 0:
-            continue
-        # Check for identical columns
-        count = find_reflection_line(pattern.T, n_cols)
-        summary += count
-
-    print("Summary:", summary)
+    with span("parse"), map_input(filename) as data:
+        rows, cols = parse_patterns(data)
+
+    with span("part1"):
+        summary = summarize(rows, cols, smudges=0)
+    print("Summary (Part 1):", summary)
+
+    with span("part2"):
+        summary = summarize(rows, cols, smudges=1)
+    print("Summary (Part 2):", summary)
 
 
 if __name__ == "__main__":
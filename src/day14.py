@@ -1,10 +1,16 @@
 """Day 14: Parabolic Reflector Dish"""
-from typing import Any
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, NamedTuple
 import numpy as np
 import numpy.typing as npy
 
+from cycles import find_cycle
+from loader import read_grid
+from timing import span, timed
 
 Platform = npy.NDArray[Any]
+Rocks = npy.NDArray[np.bool_]  # Whether there is a rock on each tile
 
 
 ROUND_ROCK = ord("O")
@@ -12,87 +18,104 @@ CUBE_ROCK = ord("#")
 EMPTY_SPACE = ord(".")
 
 
-def tilt_north(platform: Platform) -> None:
-    """Tilt the platform north"""
-    for x, col in enumerate(platform.T):
-        for y in range(col.shape[0]):
-            for j in range(0, col.shape[0] - y - 1):
-                if platform[j, x] == EMPTY_SPACE and platform[j + 1, x] == ROUND_ROCK:
-                    platform[j, x], platform[j + 1, x] = (
-                        platform[j + 1, x],
-                        platform[j, x],
-                    )
-
-
-def cycle_platform(platform: Platform) -> None:
-    """Cycle the platform"""
-    # North
-    tilt_north(platform)
-    # West
-    for y, row in enumerate(platform):
-        for x in range(row.shape[0]):
-            for j in range(0, row.shape[0] - x - 1):
-                if platform[y, j] == EMPTY_SPACE and platform[y, j + 1] == ROUND_ROCK:
-                    platform[y, j], platform[y, j + 1] = (
-                        platform[y, j + 1],
-                        platform[y, j],
-                    )
-    # South
-    for x, col in enumerate(platform.T):
-        for y in range(col.shape[0]):
-            for j in range(0, col.shape[0] - y - 1):
-                if platform[j, x] == ROUND_ROCK and platform[j + 1, x] == EMPTY_SPACE:
-                    platform[j, x], platform[j + 1, x] = (
-                        platform[j + 1, x],
-                        platform[j, x],
-                    )
-    # East
-    for y, row in enumerate(platform):
-        for x in range(row.shape[0]):
-            for j in range(0, row.shape[0] - x - 1):
-                if platform[y, j] == ROUND_ROCK and platform[y, j + 1] == EMPTY_SPACE:
-                    platform[y, j], platform[y, j + 1] = (
-                        platform[y, j + 1],
-                        platform[y, j],
-                    )
-
-
-def compute_total_load(platform: Platform) -> int:
+class Direction(Enum):
+    """Tilt directions, in spin cycle order"""
+
+    NORTH = 0
+    WEST = 1
+    SOUTH = 2
+    EAST = 3
+
+
+def orient(grid: npy.NDArray[Any], direction: Direction) -> npy.NDArray[Any]:
+    """Returns a view of the grid in which rocks roll towards the start of each row"""
+    match direction:
+        case Direction.NORTH:
+            return grid.T
+        case Direction.WEST:
+            return grid
+        case Direction.SOUTH:
+            return grid.T[:, ::-1]
+        case Direction.EAST:
+            return grid[:, ::-1]
+
+
+class Segments(NamedTuple):
+    """Runs of tiles between cube rocks, along one tilt direction"""
+
+    ids: npy.NDArray[np.intp]  # Segment of every tile (cube rocks get an empty one)
+    ranks: npy.NDArray[np.intp]  # How far each tile is from the end rocks roll to
+    count: int
+
+    @classmethod
+    def along(cls, cubes: Rocks, direction: Direction) -> "Segments":
+        """Finds the segments of the platform along the given direction"""
+        oriented = orient(cubes, direction)
+        positions = np.arange(oriented.shape[1])
+        is_start = ~oriented
+        is_start[:, 1:] &= oriented[:, :-1]
+        count = np.count_nonzero(is_start)
+
+        ids = np.empty(cubes.shape, dtype=np.intp)
+        ranks = np.empty(cubes.shape, dtype=np.intp)
+        starts = np.maximum.accumulate(np.where(is_start, positions, 0), axis=1)
+        orient(ids, direction)[...] = np.where(
+            oriented, count, np.cumsum(is_start).reshape(oriented.shape) - 1
+        )
+        orient(ranks, direction)[...] = positions - starts
+        return cls(ids, ranks, count)
+
+
+@dataclass
+class Dish:
+    """Dish with its cube rocks, and their segments along every direction"""
+
+    cubes: Rocks
+    segments: dict[Direction, Segments] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.segments = {
+            direction: Segments.along(self.cubes, direction) for direction in Direction
+        }
+
+    def tilt(self, round_rocks: Rocks, direction: Direction) -> Rocks:
+        """Returns where the round rocks end up once the dish is tilted"""
+        ids, ranks, count = self.segments[direction]
+        # Round rocks pile up at the end of their segment
+        per_segment = np.bincount(ids[round_rocks], minlength=count + 1)
+        per_segment[count] = 0
+        return ranks < per_segment[ids]
+
+    @timed()
+    def cycle(self, round_rocks: Rocks) -> Rocks:
+        """Returns where the round rocks end up after a spin cycle"""
+        for direction in Direction:
+            round_rocks = self.tilt(round_rocks, direction)
+        return round_rocks
+
+
+def compute_total_load(round_rocks: Rocks) -> int:
     """Computes total load of platform"""
-    return sum(
-        (platform.shape[0] - i) * np.count_nonzero(row == ROUND_ROCK)
-        for i, row in enumerate(platform)
-    )
+    rows = round_rocks.shape[0]
+    return int(np.count_nonzero(round_rocks, axis=1) @ np.arange(rows, 0, -1))
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    platform = np.array([list(line.strip()) for line in lines])
-    vectorized_ord = np.vectorize(ord)
-    platform: Platform = vectorized_ord(platform)
-
-    cycles: list[bytes] = []
-    cycle_start = 0
-    i = 0
-    while True:
-        cycle_platform(platform)
-        cycle_str = platform.tobytes()
-        if cycle_str in cycles:
-            cycle_start = cycles.index(cycle_str)
-            break
-        cycles.append(cycle_str)
-        i += 1
-
-    num_cycles = 1_000_000_000
-    cycle_length = i - cycle_start
-    idx = cycle_start + (num_cycles - cycle_start) % cycle_length - 1
-    cycle = np.frombuffer(cycles[idx], platform.dtype).reshape(platform.shape)
-
-    total_load = compute_total_load(cycle)
-    print("Total load:", total_load)
+    with span("parse"):
+        platform: Platform = read_grid(filename)
+        dish = Dish(platform == CUBE_ROCK)
+        round_rocks = platform == ROUND_ROCK
+
+    with span("part1"):
+        total_load = compute_total_load(dish.tilt(round_rocks, Direction.NORTH))
+    print("Total load (Part 1):", total_load)
+
+    with span("part2"):
+        cycle = find_cycle(round_rocks, dish.cycle, np.ndarray.tobytes)
+        round_rocks = cycle.state_after(1_000_000_000)
+        total_load = compute_total_load(round_rocks)
+    print("Total load (Part 2):", total_load)
 
 
 if __name__ == "__main__":
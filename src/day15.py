@@ -1,4 +1,16 @@
 """Day 15: Lens Library"""
+from dataclasses import dataclass, field
+from typing import Iterator
+import numpy as np
+import numpy.typing as npy
+
+from loader import Buffer, iter_fields, map_input
+from timing import span, timed
+
+
+# Powers of 17 and of its inverse, modulo 256 (where 17 has order 16)
+POWERS = np.array([pow(17, k, 256) for k in range(16)], dtype=np.uint8)
+INVERSE_POWERS = np.array([pow(17, -k, 256) for k in range(16)], dtype=np.uint8)
 
 
 def compute_hash(string: str) -> int:
@@ -11,49 +23,93 @@ def compute_hash(string: str) -> int:
     return curr
 
 
-def main() -> None:
-    """Main Function"""
-    assert compute_hash("HASH") == 52
+@timed()
+def hash_steps(data: Buffer) -> npy.NDArray[np.uint8]:
+    """
+    Returns the HASH of every comma-separated step in the buffer at once.
 
-    with open("input.txt", "r", encoding="utf-8") as f:
-        init_seq = f.read()
+    A step of the characters c_i, ending at position end, hashes to the sum of
+    c_i * 17 ** (end - i), which is 17 ** end times the sum of c_i * 17 ** -i:
+    the latter are differences of a single prefix sum over the whole buffer.
+    All the arithmetic is done in uint8, i.e. modulo 256.
+    """
+    # Only the trailing line break is dropped, without copying the buffer
+    end = len(data)
+    while end and data[end - 1] in b"\r\n":
+        end -= 1
+    if data.find(b"\n", 0, end) != -1 or data.find(b"\r", 0, end) != -1:
+        raise ValueError("The initialization sequence must be on a single line")
+    buffer = np.frombuffer(data, dtype=np.uint8, count=end)
+    separators = np.flatnonzero(buffer == ord(","))
 
-    steps = init_seq.split(",")
+    values = buffer * np.tile(INVERSE_POWERS, -(-len(buffer) // 16))[: len(buffer)]
+    values[separators] = 0
+    sums = np.zeros(len(buffer) + 1, dtype=np.uint8)
+    np.cumsum(values, dtype=np.uint8, out=sums[1:])
 
-    results_sum = sum(map(compute_hash, steps))
-    print("Sum:", results_sum)
+    # Separators add nothing, so each step's sum starts where the previous one ends
+    ends = np.append(separators, len(buffer))
+    return POWERS[ends % 16] * np.diff(sums[ends], prepend=np.uint8(0))
+
+
+def iter_steps(filename: str) -> Iterator[str]:
+    """Lazily yields the steps of the initialization sequence"""
+    for step in iter_fields(filename, b","):
+        yield step.decode()
 
-    boxes: list[list[tuple[str, int]]] = [[] for _ in range(256)]
 
-    for step in steps:
-        last_char = step[-1]
-        if last_char == "-":
+@dataclass
+class Hashmap:
+    """Holiday ASCII String Helper Manual Arrangement Procedure (HASHMAP)"""
+
+    # Lenses of every box, by label (dicts keep the lenses in insertion order)
+    boxes: list[dict[str, int]] = field(
+        default_factory=lambda: [{} for _ in range(256)]
+    )
+    # Focusing power of every box, and the boxes changed since it was computed
+    powers: list[int] = field(default_factory=lambda: [0] * 256)
+    changed: set[int] = field(default_factory=set)
+
+    def apply(self, step: str) -> None:
+        """Applies a step of the initialization sequence"""
+        if step[-1] == "-":
             label = step[:-1]
             box_idx = compute_hash(label)
-            boxes[box_idx] = [box for box in boxes[box_idx] if box[0] != label]
-            continue
+            if self.boxes[box_idx].pop(label, None) is not None:
+                self.changed.add(box_idx)
+            return
 
         label = step[:-2]
-        focal_length = int(step[-1])
         box_idx = compute_hash(label)
-        box = boxes[box_idx]
-        # Check if label already exists
-        label_idx = -1
-        for i, lens in enumerate(boxes[box_idx]):
-            if lens[0] == label:
-                label_idx = i
-                break
-        if label_idx == -1:
-            box.append((label, focal_length))
-        else:
-            box[label_idx] = (label, focal_length)
-
-    focusing_power = sum(
-        i * j * lens[1]
-        for i, box in enumerate(boxes, 1)
-        for j, lens in enumerate(box, 1)
-    )
+        # Replacing a lens keeps its place in the box
+        self.boxes[box_idx][label] = int(step[-1])
+        self.changed.add(box_idx)
+
+    @property
+    def focusing_power(self) -> int:
+        """Focusing power of all the lenses, recomputed for the changed boxes only"""
+        for box_idx in self.changed:
+            self.powers[box_idx] = (box_idx + 1) * sum(
+                slot * focal_length
+                for slot, focal_length in enumerate(self.boxes[box_idx].values(), 1)
+            )
+        self.changed.clear()
+        return sum(self.powers)
+
+
+def main(filename: str = "input.txt") -> None:
+    """Main Function"""
+    assert compute_hash("HASH") == 52
+
+    with span("part1"), map_input(filename) as data:
+        results_sum = int(hash_steps(data).sum(dtype=np.int64))
+    print("Sum:", results_sum)
 
+    with span("part2"):
+        hashmap = Hashmap()
+        for step in iter_steps(filename):
+            hashmap.apply(step)
+        focusing_power = hashmap.focusing_power
     print("Focusing power:", focusing_power)
 
 
@@ -1,7 +1,19 @@
 """Day 16: The Floor Will Be Lava"""
-from dataclasses import dataclass
-from enum import Enum
-from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import chain
+from multiprocessing import shared_memory
+import os
+from typing import Any, Iterator, NamedTuple
+import numpy as np
+import numpy.typing as npy
+
+from loader import read_grid
+from timing import span, timed
+
+Grid = npy.NDArray[np.uint8]
+Bitset = int  # Bit y * width + x is set for every energized tile
 
 
 class Position(NamedTuple):
@@ -11,155 +23,391 @@ class Position(NamedTuple):
     y: int
 
 
-class BeamState(Enum):
-    """Beam State Enum"""
+class BeamState(IntEnum):
+    """Beam State Enum, in clockwise order"""
 
-    LEFT = "<"
-    RIGHT = ">"
-    UP = "^"
-    DOWN = "v"
+    RIGHT = 0
+    DOWN = 1
+    LEFT = 2
+    UP = 3
 
 
-HORIZONTAL_STATES = set([BeamState.LEFT, BeamState.RIGHT])
-VERTICAL_STATES = set([BeamState.UP, BeamState.DOWN])
+STEPS = {
+    BeamState.RIGHT: Position(1, 0),
+    BeamState.DOWN: Position(0, 1),
+    BeamState.LEFT: Position(-1, 0),
+    BeamState.UP: Position(0, -1),
+}
 
+# Outgoing beam states of the mirrors, by incoming beam state
+MIRRORS = {
+    ord("/"): (BeamState.UP, BeamState.LEFT, BeamState.DOWN, BeamState.RIGHT),
+    ord("\\"): (BeamState.DOWN, BeamState.RIGHT, BeamState.UP, BeamState.LEFT),
+}
 
-@dataclass
-class Tile:
-    """Grid Tile Class"""
+# Outgoing beam states of the splitters, for the beams they split
+SPLITTERS = {
+    ord("|"): (BeamState.UP, BeamState.DOWN),
+    ord("-"): (BeamState.LEFT, BeamState.RIGHT),
+}
+
+
+def is_split(tile: int, state: BeamState) -> bool:
+    """Returns True if the tile splits beams in the given state"""
+    horizontal = state in (BeamState.LEFT, BeamState.RIGHT)
+    return tile == ord("|") if horizontal else tile == ord("-")
+
+
+def find_stops(grid: Grid) -> dict[BeamState, npy.NDArray[np.intp]]:
+    """
+    Returns the coordinate of the first mirror or splitter at or after every tile,
+    in every direction (or the coordinate just past the edge if there is none)
+    """
+    height, width = grid.shape
+    is_stop = np.isin(grid, list(MIRRORS) + list(SPLITTERS))
+    cols = np.broadcast_to(np.arange(width), grid.shape)
+    rows = np.broadcast_to(np.arange(height)[:, None], grid.shape)
+    return {
+        BeamState.RIGHT: np.minimum.accumulate(
+            np.where(is_stop, cols, width)[:, ::-1], axis=1
+        )[:, ::-1],
+        BeamState.LEFT: np.maximum.accumulate(np.where(is_stop, cols, -1), axis=1),
+        BeamState.DOWN: np.minimum.accumulate(
+            np.where(is_stop, rows, height)[::-1], axis=0
+        )[::-1],
+        BeamState.UP: np.maximum.accumulate(np.where(is_stop, rows, -1), axis=0),
+    }
 
-    state: str | BeamState
-    energized: bool = False
 
+def edge_starts(shape: tuple[int, ...]) -> Iterator[tuple[Position, BeamState]]:
+    """Yields every beam entering the grid from its edges"""
+    height, width = shape
+    for i in range(height):
+        yield Position(0, i), BeamState.RIGHT
+        yield Position(width - 1, i), BeamState.LEFT
+    for i in range(width):
+        yield Position(i, 0), BeamState.DOWN
+        yield Position(i, height - 1), BeamState.UP
+
+
+class Path(NamedTuple):
+    """Tiles a beam energizes until it leaves the grid, loops or is split"""
+
+    bits: Bitset
+    splitter: Position | None  # Splitter splitting the beam, if any
+
+
+@dataclass
+class Contraption:
+    """
+    Contraption of mirrors and splitters, with the beams between splitters
+    traced once into a graph, whose strongly connected components are
+    condensed along with the tiles they energize
+    """
 
-def move_beam(
-    grid: list[list[Tile]], start_pos: Position, start_state: BeamState
-) -> None:
-    """Move beam across the grid, starting in the given position"""
-    size = len(grid[0]), len(grid)
+    grid: Grid
+    # Coordinate of the first mirror or splitter at or after each tile, by direction
+    stops: dict[BeamState, npy.NDArray[np.intp]] = field(default_factory=dict)
+    # Tiles energized from every splitter (once split), by splitter
+    energized: dict[Position, Bitset] = field(default_factory=dict)
 
-    def is_valid(pos: Position) -> bool:
+    def __post_init__(self) -> None:
+        self.stops = find_stops(self.grid)
+        self.energized = self.condense()
+
+    def is_valid(self, pos: Position) -> bool:
         """Check if a given position is valid in the grid"""
-        return 0 <= pos.x < size[0] and 0 <= pos.y < size[1]
-
-    curr_pos = start_pos
-    curr_state = start_state
-
-    while True:
-        if not is_valid(curr_pos):
-            return
-        curr_tile = grid[curr_pos.y][curr_pos.x]
-        if curr_tile.state == curr_state:
-            return
-        curr_tile.energized = True
-        match curr_tile.state:
-            case "/":
-                match curr_state:
-                    case BeamState.RIGHT:
-                        curr_pos = Position(curr_pos.x, curr_pos.y - 1)
-                        curr_state = BeamState.UP
-                    case BeamState.LEFT:
-                        curr_pos = Position(curr_pos.x, curr_pos.y + 1)
-                        curr_state = BeamState.DOWN
-                    case BeamState.DOWN:
-                        curr_pos = Position(curr_pos.x - 1, curr_pos.y)
-                        curr_state = BeamState.LEFT
-                    case BeamState.UP:
-                        curr_pos = Position(curr_pos.x + 1, curr_pos.y)
-                        curr_state = BeamState.RIGHT
-            case "\\":
-                match curr_state:
-                    case BeamState.RIGHT:
-                        curr_pos = Position(curr_pos.x, curr_pos.y + 1)
-                        curr_state = BeamState.DOWN
-                    case BeamState.LEFT:
-                        curr_pos = Position(curr_pos.x, curr_pos.y - 1)
-                        curr_state = BeamState.UP
-                    case BeamState.DOWN:
-                        curr_pos = Position(curr_pos.x + 1, curr_pos.y)
-                        curr_state = BeamState.RIGHT
-                    case BeamState.UP:
-                        curr_pos = Position(curr_pos.x - 1, curr_pos.y)
-                        curr_state = BeamState.LEFT
-            case "|":
-                if curr_state in HORIZONTAL_STATES:
-                    upper_pos = Position(curr_pos.x, curr_pos.y - 1)
-                    bottom_pos = Position(curr_pos.x, curr_pos.y + 1)
-                    move_beam(grid, upper_pos, BeamState.UP)
-                    move_beam(grid, bottom_pos, BeamState.DOWN)
-                    return
-                flag = 1 if curr_state == BeamState.DOWN else -1
-                curr_pos = Position(curr_pos.x, curr_pos.y + flag)
-            case "-":
-                if curr_state in VERTICAL_STATES:
-                    left_pos = Position(curr_pos.x - 1, curr_pos.y)
-                    right_pos = Position(curr_pos.x + 1, curr_pos.y)
-                    move_beam(grid, left_pos, BeamState.LEFT)
-                    move_beam(grid, right_pos, BeamState.RIGHT)
-                    return
-                flag = 1 if curr_state == BeamState.RIGHT else -1
-                curr_pos = Position(curr_pos.x + flag, curr_pos.y)
-            case "." | _:
-                match curr_state:
-                    case BeamState.RIGHT:
-                        curr_pos = Position(curr_pos.x + 1, curr_pos.y)
-                    case BeamState.LEFT:
-                        curr_pos = Position(curr_pos.x - 1, curr_pos.y)
-                    case BeamState.DOWN:
-                        curr_pos = Position(curr_pos.x, curr_pos.y + 1)
-                    case BeamState.UP:
-                        curr_pos = Position(curr_pos.x, curr_pos.y - 1)
-                curr_tile.state = curr_state
-
-
-def compute_total_energized(grid: list[list[Tile]]) -> int:
-    """Computes the total number of energized tiles"""
-    return sum(tile.energized for row in grid for tile in row)
-
-
-def main() -> None:
-    """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    lines = list(map(str.strip, lines))
-
-    max_energized = 0
-    size = len(lines[0]), len(lines)
-
-    # Left
-    for i in range(size[1]):
-        grid = [list(map(Tile, line)) for line in lines]
-        start = Position(0, i)
-        move_beam(grid, start, BeamState.RIGHT)
-        total_energized = compute_total_energized(grid)
-        max_energized = max(max_energized, total_energized)
-
-    # Right
-    for i in range(size[1]):
-        grid = [list(map(Tile, line)) for line in lines]
-        start = Position(size[0] - 1, i)
-        move_beam(grid, start, BeamState.LEFT)
-        total_energized = compute_total_energized(grid)
-        max_energized = max(max_energized, total_energized)
-
-    # Top
-    for i in range(size[0]):
-        grid = [list(map(Tile, line)) for line in lines]
-        start = Position(i, 0)
-        move_beam(grid, start, BeamState.DOWN)
-        total_energized = compute_total_energized(grid)
-        max_energized = max(max_energized, total_energized)
-
-    # Bottom
-    for i in range(size[0]):
-        grid = [list(map(Tile, line)) for line in lines]
-        start = Position(i, size[1] - 1)
-        move_beam(grid, start, BeamState.UP)
-        total_energized = compute_total_energized(grid)
-        max_energized = max(max_energized, total_energized)
-
-    print("Total energized:", max_energized)
+        return 0 <= pos.x < self.grid.shape[1] and 0 <= pos.y < self.grid.shape[0]
+
+    def to_bitset(self, segments: list[range]) -> Bitset:
+        """
+        Packs the energized tiles, given as ranges of flat indices, into a
+        bitset, only packing the span of the grid that they cover
+        """
+        if not segments:
+            return 0
+        tiles = np.concatenate([np.arange(r.start, r.stop, r.step) for r in segments])
+        lowest = int(tiles.min())
+        lit = np.zeros(int(tiles.max()) - lowest + 1, dtype=np.bool_)
+        lit[tiles - lowest] = True
+        packed = np.packbits(lit, bitorder="little").tobytes()
+        return int.from_bytes(packed, "little") << lowest
+
+    def trace(self, pos: Position, state: BeamState) -> Path:
+        """Traces a beam, a straight segment at a time, until it is split"""
+        width = self.grid.shape[1]
+        segments: list[range] = []
+        seen: set[tuple[Position, BeamState]] = set()
+        while self.is_valid(pos) and (pos, state) not in seen:
+            seen.add((pos, state))
+            # Light the tiles up to the next mirror or splitter (or the edge)
+            stop = int(self.stops[state][pos.y, pos.x])
+            if state in (BeamState.LEFT, BeamState.RIGHT):
+                first, last = max(min(pos.x, stop), 0), min(max(pos.x, stop), width - 1)
+                segments.append(range(pos.y * width + first, pos.y * width + last + 1))
+                pos = Position(stop, pos.y)
+            else:
+                first = max(min(pos.y, stop), 0)
+                last = min(max(pos.y, stop), self.grid.shape[0] - 1)
+                segments.append(
+                    range(first * width + pos.x, last * width + pos.x + 1, width)
+                )
+                pos = Position(pos.x, stop)
+            if not self.is_valid(pos):
+                break
+
+            tile = int(self.grid[pos.y, pos.x])
+            if is_split(tile, state):
+                return Path(self.to_bitset(segments), pos)
+            if tile in MIRRORS:
+                state = MIRRORS[tile][state]
+            step = STEPS[state]
+            pos = Position(pos.x + step.x, pos.y + step.y)
+        return Path(self.to_bitset(segments), None)
+
+    def split_paths(self, splitter: Position) -> Iterator[Path]:
+        """Traces the two beams leaving a splitter"""
+        for state in SPLITTERS[int(self.grid[splitter.y, splitter.x])]:
+            step = STEPS[state]
+            yield self.trace(Position(splitter.x + step.x, splitter.y + step.y), state)
+
+    @timed()
+    def condense(self) -> dict[Position, Bitset]:
+        """
+        Builds the graph of splitters, and returns the tiles energized from
+        every splitter: the union of the tiles lit within its strongly
+        connected component and those energized from the components it reaches
+        """
+        width = self.grid.shape[1]
+        own: dict[Position, Bitset] = {}
+        edges: dict[Position, list[Position]] = {}
+        for y, x in zip(*np.nonzero(np.isin(self.grid, list(SPLITTERS)))):
+            splitter = Position(int(x), int(y))
+            own[splitter] = 1 << (splitter.y * width + splitter.x)
+            edges[splitter] = []
+            for path in self.split_paths(splitter):
+                own[splitter] |= path.bits
+                if path.splitter is not None:
+                    edges[splitter].append(path.splitter)
+
+        energized: dict[Position, Bitset] = {}
+        for component in strongly_connected_components(edges):
+            # Components come in reverse topological order, so the ones this
+            # one reaches are already done
+            bits = 0
+            for splitter in component:
+                bits |= own.pop(splitter)  # Only needed by its own component
+                for successor in edges[splitter]:
+                    bits |= energized.get(successor, 0)
+            for splitter in component:
+                energized[splitter] = bits
+        return energized
+
+    def count_energized(self, pos: Position, state: BeamState) -> int:
+        """Counts the tiles energized by a beam entering the grid"""
+        path = self.trace(pos, state)
+        bits = path.bits
+        if path.splitter is not None:
+            bits |= self.energized[path.splitter]
+        return bits.bit_count()
+
+
+def strongly_connected_components(
+    edges: dict[Position, list[Position]],
+) -> Iterator[list[Position]]:
+    """Tarjan's algorithm (without recursion), in reverse topological order"""
+    index: dict[Position, int] = {}
+    lowlink: dict[Position, int] = {}
+    stack: list[Position] = []
+    on_stack: dict[Position, int] = {}  # Where each node is on the stack
+    for root in edges:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        on_stack[root] = len(stack)
+        stack.append(root)
+        work = [(root, iter(edges[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    on_stack[successor] = len(stack)
+                    stack.append(successor)
+                    work.append((successor, iter(edges[successor])))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    # The node is the root of a component, still on the stack
+                    component = stack[on_stack[node] :]
+                    del stack[on_stack[node] :]
+                    for member in component:
+                        del on_stack[member]
+                    yield component
+
+
+# Outgoing beam states, by tile and incoming beam state
+OUTGOING = [[(state,) for state in range(4)] for _ in range(256)]
+for _tile, _turns in MIRRORS.items():
+    OUTGOING[_tile] = [(int(turn),) for turn in _turns]
+for _tile, _split in SPLITTERS.items():
+    OUTGOING[_tile] = [
+        tuple(map(int, _split)) if is_split(_tile, BeamState(state)) else (state,)
+        for state in range(4)
+    ]
+
+
+@dataclass
+class Sweeper:
+    """
+    Traces whole beams over the flattened grid, reusing its bitmaps of energized
+    tiles and of the beam states already traced from each tile between beams
+    """
+
+    grid: Grid
+    tiles: memoryview = field(default_factory=lambda: memoryview(b""))
+    stops: list[memoryview] = field(default_factory=list)  # By beam state
+    lit: npy.NDArray[np.bool_] = field(default_factory=lambda: np.zeros(0, np.bool_))
+    visited: bytearray = field(default_factory=bytearray)  # Bit s for state s
+
+    def __post_init__(self) -> None:
+        self.tiles = memoryview(self.grid.reshape(-1))
+        stops = find_stops(self.grid)
+        self.stops = [
+            memoryview(stops[state].astype(np.int64).ravel()) for state in BeamState
+        ]
+        self.lit = np.zeros(self.grid.shape, dtype=np.bool_)
+        self.visited = bytearray(self.grid.size)
+
+    def count_energized(self, pos: Position, state: BeamState) -> int:
+        """Counts the tiles energized by a beam, a straight segment at a time"""
+        height, width = self.grid.shape
+        beams = [(pos.x, pos.y, int(state))]
+        while beams:
+            x, y, direction = beams.pop()
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+            tile = y * width + x
+            if self.visited[tile] >> direction & 1:
+                continue
+            self.visited[tile] |= 1 << direction
+
+            # Light the tiles up to the next mirror or splitter (or the edge)
+            stop = self.stops[direction][tile]
+            if direction in (BeamState.RIGHT, BeamState.LEFT):
+                self.lit[y, max(min(x, stop), 0) : max(x, stop) + 1] = True
+                x = stop
+            else:
+                self.lit[max(min(y, stop), 0) : max(y, stop) + 1, x] = True
+                y = stop
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+
+            for direction in OUTGOING[self.tiles[y * width + x]][direction]:
+                step = STEPS[BeamState(direction)]
+                beams.append((x + step.x, y + step.y, direction))
+
+        count = np.count_nonzero(self.lit)
+        self.lit.fill(False)
+        self.visited[:] = bytes(len(self.visited))
+        return count
+
+
+# State of each worker process of the parallel sweep
+WORKER: dict[str, Any] = {}
+
+
+def attach_grid(name: str, shape: tuple[int, ...]) -> None:
+    """Attaches the worker to the grid in shared memory"""
+    memory = shared_memory.SharedMemory(name=name)
+    WORKER["memory"] = memory  # The grid is only valid while the memory is open
+    WORKER["sweeper"] = Sweeper(np.ndarray(shape, dtype=np.uint8, buffer=memory.buf))
+
+
+def sweep_starts(starts: list[tuple[Position, BeamState]]) -> list[int]:
+    """Counts the tiles energized by each of the beams, in a worker process"""
+    sweeper: Sweeper = WORKER["sweeper"]
+    return [sweeper.count_energized(pos, state) for pos, state in starts]
+
+
+@timed()
+def parallel_sweep(grid: Grid, jobs: int = 0) -> list[int]:
+    """
+    Counts the tiles energized by every beam entering the grid from its edges,
+    across jobs worker processes (1 counts in this process, 0 uses every core),
+    which share the grid
+    """
+    starts = list(edge_starts(grid.shape))
+    if jobs == 1:
+        sweeper = Sweeper(grid)
+        return [sweeper.count_energized(pos, state) for pos, state in starts]
+    workers = jobs or os.cpu_count() or 1
+    chunk_size = -(-len(starts) // (4 * workers))
+    chunks = [starts[i : i + chunk_size] for i in range(0, len(starts), chunk_size)]
+
+    memory = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+    try:
+        shared = np.ndarray(grid.shape, dtype=np.uint8, buffer=memory.buf)
+        shared[...] = grid
+        del shared  # The memory cannot be closed while it is still referenced
+        with ProcessPoolExecutor(
+            workers, initializer=attach_grid, initargs=(memory.name, grid.shape)
+        ) as executor:
+            return list(chain.from_iterable(executor.map(sweep_starts, chunks)))
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def sweep_setting() -> tuple[bool, int]:
+    """
+    Reads AOC_DAY16_SWEEP, which, if set to a number of jobs (1 counts in this
+    process, 0 uses every core), sweeps every beam instead of condensing the
+    graph of splitters
+    """
+    value = os.environ.get("AOC_DAY16_SWEEP")
+    if value is None:
+        return False, 0
+    if not value.strip().isdigit():
+        raise ValueError(
+            f"AOC_DAY16_SWEEP must be a number of jobs (0 uses every core), "
+            f"not {value!r}"
+        )
+    return True, int(value)
+
+
+def main(filename: str = "input.txt", sweep: bool | None = None, jobs: int = 0) -> None:
+    """
+    Main Function: energized tiles are counted from the condensed splitter
+    graph, or by sweeping every beam across jobs worker processes (both are
+    read from AOC_DAY16_SWEEP unless sweep is given)
+    """
+    if sweep is None:
+        sweep, jobs = sweep_setting()
+
+    with span("parse"):
+        grid = read_grid(filename)
+        solver = Sweeper(grid) if sweep else Contraption(grid)
+
+    with span("part1"):
+        total_energized = solver.count_energized(Position(0, 0), BeamState.RIGHT)
+    print("Total energized (Part 1):", total_energized)
+
+    with span("part2"):
+        if sweep:
+            max_energized = max(parallel_sweep(grid, jobs), default=0)
+        else:
+            max_energized = max(
+                solver.count_energized(pos, state)
+                for pos, state in edge_starts(grid.shape)
+            )
+    print("Total energized (Part 2):", max_energized)
 
 
 if __name__ == "__main__":
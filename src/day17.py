@@ -1,73 +1,121 @@
 """Day 17: Clumsy Crucible"""
-from heapq import heappop, heappush
+from array import array
+from dataclasses import dataclass, field
 from typing import NamedTuple
 
-Position = tuple[int, int]
-Grid = dict[complex, int]
-
-
-class QueueItem(NamedTuple):
-    """Queue Item tuple"""
-
-    cost: int
-    position: Position
-    direction: Position
-
-    def to_complex(self) -> tuple[complex, complex]:
-        """Convert integer coordinates to complex ones"""
-        return complex(*self.position), complex(*self.direction)
-
-
-def dijkstra(grid: Grid, dest: complex, min_moves: int = 0, max_moves: int = 3) -> int:
-    """Dijkstra's algorithm, adapted"""
-
-    def c2t(c: complex) -> Position:
-        return int(c.real), int(c.imag)
-
-    pq: list[QueueItem] = []
-    visited: dict[tuple[complex, complex], int] = {}
-
-    for startd in [1, 1j, -1, -1j]:
-        heappush(pq, QueueItem(0, c2t(0), c2t(startd)))
-
-    while pq:
-        item = heappop(pq)
-        curr_block = item.to_complex()
-
-        if curr_block in visited and visited[curr_block] <= item.cost:
-            continue
-        if curr_block[0] == dest:
-            return item.cost
-
-        visited[curr_block] = item.cost
-        for turn in (1j, -1j):
-            newd = curr_block[1] * turn
-            newp = curr_block[0]
-            new_cost = item.cost
-            for i in range(1, max_moves + 1):
-                newp += newd
-                if newp not in grid:
-                    break
-                new_cost += grid[newp]
-                if i > min_moves:
-                    heappush(pq, QueueItem(new_cost, c2t(newp), c2t(newd)))
+from loader import read_grid
+from timing import span, timed
+
+# Axis along which the crucible entered a block
+HORIZONTAL, VERTICAL = 0, 1
+# Heat loss of a block, at most
+MAX_LOSS = 9
+UNREACHED = 2**62
+
+
+class HeatMap(NamedTuple):
+    """Heat loss of every block, flattened row by row"""
+
+    losses: bytes
+    height: int
+    width: int
+
+    @classmethod
+    def from_file(cls, filename: str) -> "HeatMap":
+        """Reads the heat map, a digit per block"""
+        grid = read_grid(filename)
+        return cls((grid - ord("0")).tobytes(), *grid.shape)
+
+    def turns(self, block: int, axis: int) -> tuple[tuple[int, int], ...]:
+        """
+        Returns the stride between blocks and the blocks left before the edge,
+        both ways across the given axis
+        """
+        row, col = divmod(block, self.width)
+        if axis == HORIZONTAL:
+            return (self.width, self.height - 1 - row), (-self.width, row)
+        return (1, self.width - 1 - col), (-1, col)
+
+
+@dataclass
+class Search:
+    """
+    Dijkstra's algorithm, adapted: a state is a block and the axis the crucible
+    entered it along, numbered 2 * block + axis. Moves cost at most
+    MAX_LOSS * max_moves, so the queue is a ring of that many buckets, plus one,
+    indexed by heat loss (Dial's algorithm).
+    """
+
+    heat_map: HeatMap
+    min_moves: int
+    max_moves: int
+    distances: array = field(default_factory=lambda: array("q"))
+    buckets: list[list[int]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.distances = array("q", [UNREACHED]) * (2 * len(self.heat_map.losses))
+        self.buckets = [[] for _ in range(MAX_LOSS * self.max_moves + 1)]
+
+    def push(self, state: int, cost: int) -> bool:
+        """Queues the state, if it was not reached at a lower cost yet"""
+        if cost >= self.distances[state]:
+            return False
+        self.distances[state] = cost
+        self.buckets[cost % len(self.buckets)].append(state)
+        return True
+
+    def expand(self, state: int, cost: int) -> int:
+        """
+        Turns left or right, and moves up to max_moves blocks in a straight line.
+        Returns how many states were queued.
+        """
+        losses = self.heat_map.losses
+        block, axis = divmod(state, 2)
+        queued = 0
+        for stride, room in self.heat_map.turns(block, axis):
+            new_block, new_cost = block, cost
+            for moves in range(1, min(self.max_moves, room) + 1):
+                new_block += stride
+                new_cost += losses[new_block]
+                if moves > self.min_moves:
+                    queued += self.push(2 * new_block + (axis ^ 1), new_cost)
+        return queued
+
+
+@timed()
+def dijkstra(heat_map: HeatMap, min_moves: int = 0, max_moves: int = 3) -> int:
+    """Returns the least heat loss from the top-left block to the bottom-right one"""
+    search = Search(heat_map, min_moves, max_moves)
+    dest = len(heat_map.losses) - 1
+
+    # The crucible starts in the top-left block, facing either way
+    queued = search.push(HORIZONTAL, 0) + search.push(VERTICAL, 0)
+    cost = 0
+    while queued:
+        bucket = search.buckets[cost % len(search.buckets)]
+        while bucket:
+            state = bucket.pop()
+            queued -= 1
+            if search.distances[state] != cost:  # Reached at a lower cost since
+                continue
+            if state // 2 == dest:
+                return cost
+            queued += search.expand(state, cost)
+        cost += 1
     raise ValueError("No solution found")
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.read()
-
-    grid: Grid = {}
-    p = complex()
-    for r, line in enumerate(lines.splitlines()):
-        for c, char in enumerate(line):
-            p = c - r * 1j
-            grid[p] = int(char)
-
-    print("Heat loss (Part 1):", dijkstra(grid, dest=p))
-    print("Heat loss (Part 2):", dijkstra(grid, dest=p, min_moves=3, max_moves=10))
+    with span("parse"):
+        heat_map = HeatMap.from_file(filename)
+
+    with span("part1"):
+        heat_loss = dijkstra(heat_map)
+    print("Heat loss (Part 1):", heat_loss)
+    with span("part2"):
+        heat_loss = dijkstra(heat_map, min_moves=3, max_moves=10)
+    print("Heat loss (Part 2):", heat_loss)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ from enum import Enum
 from functools import cache
 from shapely import Polygon  # type: ignore
 
+from timing import span
+
 
 class Direction(Enum):
     """Direction Enum"""
@@ -68,20 +70,22 @@ def compute_area(polygon: Polygon) -> int:
     return int(polygon.area + polygon.length // 2 + 1)
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
+    with open(filename, "r", encoding="utf-8") as f:
         content = f.read()
 
     lines = content.splitlines()
 
-    steps = list(map(parse_line_part1, lines))
-    polygon = dig(steps)
-    print(f"Size of the lagoon (Part 1): {compute_area(polygon)}")
+    with span("part1"):
+        steps = list(map(parse_line_part1, lines))
+        area = compute_area(dig(steps))
+    print(f"Size of the lagoon (Part 1): {area}")
 
-    steps = list(map(parse_line_part2, lines))
-    polygon = dig(steps)
-    print(f"Size of the lagoon (Part 2): {compute_area(polygon)}")
+    with span("part2"):
+        steps = list(map(parse_line_part2, lines))
+        area = compute_area(dig(steps))
+    print(f"Size of the lagoon (Part 2): {area}")
 
 
 if __name__ == "__main__":
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Self
 
+from timing import span, timed
+
 
 class PartCategory(Enum):
     """Part Category Enum"""
@@ -132,6 +134,7 @@ class Worflow:
         return splits
 
 
+@timed()
 def parse_workflows(workflows: list[str]) -> dict[str, Worflow]:
     """Parse workflows"""
     workflow_dict: dict[str, Worflow] = {}
@@ -161,8 +164,8 @@ def part1(workflows: dict[str, Worflow], rating: Rating) -> int:
     while True:
         curr_wf = workflows[curr_wf_name]
         for rule in curr_wf.rules:
-            part = rating[rule.category]
-            if not rule.match(part):
+            value = rating[rule.category]
+            if not rule.match(value):
                 continue
             match rule.next_workflow:
                 case Flow.ACCEPTED:
@@ -205,18 +208,21 @@ def part2(workflows: dict[str, Worflow]) -> int:
     return total_possibilities
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as file:
-        workflows, ratings = file.read().split("\n\n")
+    with span("parse"):
+        with open(filename, "r", encoding="utf-8") as file:
+            workflows, ratings = file.read().split("\n\n")
 
-    workflows = parse_workflows(workflows.splitlines())
-    ratings = parse_ratings(ratings.splitlines())
+        workflows = parse_workflows(workflows.splitlines())
+        ratings = parse_ratings(ratings.splitlines())
 
-    part1_sum = sum(part1(workflows, rating) for rating in ratings)
+    with span("part1"):
+        part1_sum = sum(part1(workflows, rating) for rating in ratings)
     print(f"Part 1: {part1_sum}")
 
-    part2_sum = part2(workflows)
+    with span("part2"):
+        part2_sum = part2(workflows)
     print(f"Part 2: {part2_sum}")
 
 
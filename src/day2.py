@@ -1,61 +1,91 @@
 """Day 2: Cube Conundrum"""
-from dataclasses import dataclass
-from typing import Self
-
-MAX_RED = 12
-MAX_GREEN = 13
-MAX_BLUE = 14
-
-
-@dataclass
-class Game:
-    """Game class"""
-    id: int = 0
-    red: int = 0
-    green: int = 0
-    blue: int = 0
-
-    @classmethod
-    def parse_str(cls, s: str) -> Self:
-        """Parse string to Game object"""
-        s = s.strip()
-        game = cls()
-        colon = s.split(": ")
-        game.id = int(colon[0].split()[1])
-        game_sets = [game_round.split(", ") for game_round in colon[1].split("; ")]
-        game_sets = [item for sublist in game_sets for item in sublist]
-        for game_set in game_sets:
-            no_cubes = int(game_set.split()[0])
-            if game_set.endswith("red"):
-                game.red = max(game.red, no_cubes)
-            elif game_set.endswith("green"):
-                game.green = max(game.green, no_cubes)
-            else:
-                game.blue = max(game.blue, no_cubes)
-        return game
-
-    @property
-    def cubes_power(self) -> int:
-        """Return cubes power"""
-        return self.red * self.green * self.blue
-
-    @property
-    def is_possible(self) -> bool:
-        """Return True if game is possible"""
-        return self.red <= MAX_RED and self.green <= MAX_GREEN and self.blue <= MAX_BLUE
-
-
-def main() -> None:
-    """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+from typing import Any, NamedTuple
+import numpy as np
+import numpy.typing as npy
+
+from loader import Buffer, map_input
+from timing import span
+
+
+class CubeLimits(NamedTuple):
+    """Maximum number of cubes of each color"""
+
+    red: int = 12
+    green: int = 13
+    blue: int = 14
+
+
+# One record per game, with the maximum number of cubes shown of each color
+GAME_DTYPE = np.dtype(
+    [("id", np.int64), ("red", np.int64), ("green", np.int64), ("blue", np.int64)]
+)
+
+Games = npy.NDArray[Any]
+
+
+def parse_numbers(
+    buffer: npy.NDArray[np.uint8],
+) -> tuple[npy.NDArray[np.int64], npy.NDArray[np.intp]]:
+    """Returns the values of all the numbers in the buffer and where each one ends"""
+    is_digit = (buffer >= ord("0")) & (buffer <= ord("9"))
+    edges = np.diff(is_digit.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not starts.size:
+        return np.zeros(0, dtype=np.int64), ends
 
-    games = [Game.parse_str(line) for line in lines]
+    digits = np.flatnonzero(is_digit)
+    exponents = np.repeat(ends, ends - starts) - 1 - digits
+    offsets = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+    values = np.add.reduceat((buffer[digits] - ord("0")) * 10**exponents, offsets)
+    return values, ends
 
-    print(*games, sep="\n")
 
-    print("Sum IDs:", sum(game.id for game in games if game.is_possible))
-    print("Sum Powers:", sum(game.cubes_power for game in games))
+def parse_games(data: Buffer) -> Games:
+    """Parses every game in the input at once into a GAME_DTYPE array"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    values, ends = parse_numbers(buffer)
+
+    # Each number is either a game ID (followed by ':') or a cube count
+    # (followed by ' ' and the color, told apart by its first letter)
+    kinds = buffer[ends]
+    kinds = np.where(kinds == ord(" "), buffer[ends + 1], kinds)
+    is_id = kinds == ord(":")
+    game_idx = np.cumsum(is_id) - 1
+
+    games = np.zeros(np.count_nonzero(is_id), dtype=GAME_DTYPE)
+    games["id"] = values[is_id]
+    for color in ("red", "green", "blue"):
+        is_color = kinds == ord(color[0])
+        np.maximum.at(games[color], game_idx[is_color], values[is_color])
+    return games
+
+
+def is_possible(
+    games: Games, limits: CubeLimits = CubeLimits()
+) -> npy.NDArray[np.bool_]:
+    """Returns which games are possible with the given cube limits"""
+    return (
+        (games["red"] <= limits.red)
+        & (games["green"] <= limits.green)
+        & (games["blue"] <= limits.blue)
+    )
+
+
+def cubes_power(games: Games) -> npy.NDArray[np.int64]:
+    """Returns the cubes power of every game"""
+    return games["red"] * games["green"] * games["blue"]
+
+
+def main(filename: str = "input.txt") -> None:
+    """Main function"""
+    with span("parse"), map_input(filename) as data:
+        games = parse_games(data)
+
+    with span("part1"):
+        print("Sum IDs:", games["id"][is_possible(games)].sum())
+    with span("part2"):
+        print("Sum Powers:", cubes_power(games).sum())
 
 
 if __name__ == "__main__":
@@ -6,6 +6,9 @@ from enum import Enum
 import math
 from typing import Iterator, override
 
+from cycles import find_cycle
+from timing import span, timed
+
 
 class Pulse(Enum):
     """Pulse Enum"""
@@ -28,6 +31,13 @@ class BaseModule(ABC):
     def reset(self):
         """Resets the fields"""
 
+    def save(self) -> list[int]:
+        """Returns the module's memory"""
+        return []
+
+    def load(self, memory: Iterator[int]) -> None:
+        """Restores the module's memory, as returned by save"""
+
 
 @dataclass
 class FlipFlop(BaseModule):
@@ -46,6 +56,14 @@ class FlipFlop(BaseModule):
     def reset(self):
         self.state = False
 
+    @override
+    def save(self) -> list[int]:
+        return [self.state]
+
+    @override
+    def load(self, memory: Iterator[int]) -> None:
+        self.state = bool(next(memory))
+
 
 @dataclass
 class Conjunction(BaseModule):
@@ -69,14 +87,25 @@ class Conjunction(BaseModule):
         for input_name in self.last_inputs:
             self.last_inputs[input_name] = Pulse.LOW
 
+    @override
+    def save(self) -> list[int]:
+        return [pulse.value for pulse in self.last_inputs.values()]
+
+    @override
+    def load(self, memory: Iterator[int]) -> None:
+        for input_name in self.last_inputs:
+            self.last_inputs[input_name] = Pulse(next(memory))
+
 
 class Broadcast(BaseModule):
     """Broadcast Module"""
+
     @override
     def process_pulse(self, input_name: str, pulse: Pulse) -> Pulse | None:
         return pulse
 
 
+@timed()
 def get_modules(lines: list[str]) -> dict[str, BaseModule]:
     """Parses the input and returns a dictionary of modules"""
     modules: dict[str, BaseModule] = {}
@@ -101,6 +130,7 @@ def get_modules(lines: list[str]) -> dict[str, BaseModule]:
     return modules
 
 
+@timed()
 def count_pulses(modules: dict[str, BaseModule]) -> dict[Pulse, int]:
     """Returns the pulse count, given the current modules' state"""
     counter = {Pulse.LOW: 0, Pulse.HIGH: 0}
@@ -116,6 +146,31 @@ def count_pulses(modules: dict[str, BaseModule]) -> dict[Pulse, int]:
     return counter
 
 
+@dataclass
+class Network:
+    """Modules of the network, which can be saved to and restored from bytes"""
+
+    modules: dict[str, BaseModule]
+    # Pulses sent by a press of the button, by the memory it was pressed from
+    pulses: dict[bytes, dict[Pulse, int]] = field(default_factory=dict)
+
+    def save(self) -> bytes:
+        """Returns the memory of every module"""
+        return bytes(bit for module in self.modules.values() for bit in module.save())
+
+    def load(self, memory: bytes) -> None:
+        """Restores the memory of every module"""
+        bits = iter(memory)
+        for module in self.modules.values():
+            module.load(bits)
+
+    def press_button(self, memory: bytes) -> bytes:
+        """Presses the button once from the given memory, returning the next one"""
+        self.load(memory)
+        self.pulses[memory] = count_pulses(self.modules)
+        return self.save()
+
+
 def get_counter_ranges(modules: dict[str, BaseModule]) -> Iterator[int]:
     """Part 2"""
     for broadcaster_output in modules["broadcaster"].destinations:
@@ -138,21 +193,28 @@ def get_counter_ranges(modules: dict[str, BaseModule]) -> Iterator[int]:
         yield int(bits, 2)
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        text = f.read()
-
-    lines = text.splitlines()
-    modules = get_modules(lines)
-    counters = [count_pulses(modules) for _ in range(1000)]
-
-    print(
-        "Part 1:",
-        sum(counter[Pulse.LOW] for counter in counters)
-        * sum(counter[Pulse.HIGH] for counter in counters),
-    )
-    print("Part 2:", math.lcm(*get_counter_ranges(modules)))
+    with span("parse"):
+        with open(filename, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        lines = text.splitlines()
+        modules = get_modules(lines)
+
+    with span("part1"):
+        # The network may well loop before the presses run out
+        network = Network(modules)
+        cycle = find_cycle(network.save(), network.press_button, bytes, max_steps=1000)
+        counters = [network.pulses[cycle.state_after(press)] for press in range(1000)]
+        pulses = sum(counter[Pulse.LOW] for counter in counters) * sum(
+            counter[Pulse.HIGH] for counter in counters
+        )
+    print("Part 1:", pulses)
+
+    with span("part2"):
+        presses = math.lcm(*get_counter_ranges(modules))
+    print("Part 2:", presses)
 
 
 if __name__ == "__main__":
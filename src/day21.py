@@ -1,6 +1,8 @@
 """Day 21: Step Counter"""
 from dataclasses import dataclass
 
+from timing import span, timed
+
 
 Position = tuple[int, int]
 
@@ -14,6 +16,7 @@ class Garden:
     extents: Position
 
 
+@timed()
 def walk_garden(garden: Garden, steps: int) -> int:
     """Returns the number of garden plots reached after a given number of steps"""
     height, width = garden.extents
@@ -83,16 +86,20 @@ def build_garden(lines: list[str], expand: int = 1) -> Garden:
     return Garden(expanded_rocks, start, extents)
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
+    with open(filename, "r", encoding="utf-8") as f:
         lines = f.read().splitlines()
 
-    garden = build_garden(lines)
-    print("Part 1:", walk_garden(garden, steps=64))
+    with span("part1"):
+        garden = build_garden(lines)
+        plots = walk_garden(garden, steps=64)
+    print("Part 1:", plots)
 
-    garden = build_garden(lines, expand=5)
-    print("Part 2:", compute_part2(garden))
+    with span("part2"):
+        garden = build_garden(lines, expand=5)
+        plots = compute_part2(garden)
+    print("Part 2:", plots)
 
 
 if __name__ == "__main__":
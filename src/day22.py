@@ -1,6 +1,9 @@
 """Day 22: Sand Slabs"""
 from dataclasses import dataclass, field
-from typing import NamedTuple, Self
+from typing import Iterable, NamedTuple, Self
+
+from loader import iter_lines
+from timing import span, timed
 
 
 class Range(NamedTuple):
@@ -56,8 +59,9 @@ class Brick:
             other.collapse_removed(removed)
 
 
-def parse_bricks(lines: list[str]) -> list[Brick]:
-    """Parses a list of strings and returns a list of Bricks"""
+@timed()
+def parse_bricks(lines: Iterable[str]) -> list[Brick]:
+    """Parses the given lines and returns a list of Bricks"""
 
     def parse_brick(line: str) -> Brick:
         start, end = line.split("~")
@@ -93,22 +97,25 @@ def parse_bricks(lines: list[str]) -> list[Brick]:
     return bricks
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    with span("parse"):
+        lines = iter_lines(filename)
 
-    bricks = parse_bricks(lines)
+        bricks = parse_bricks(lines)
 
     remove_count = 0
     chain_count = 0
-    for brick in bricks:
-        if len(brick.above) == 0 or all(len(other.below) > 1 for other in brick.above):
-            remove_count += 1
-            continue
-
-        supported = brick.collapse()
-        chain_count += len(supported)
+    with span("part1+2"):
+        for brick in bricks:
+            if len(brick.above) == 0 or all(
+                len(other.below) > 1 for other in brick.above
+            ):
+                remove_count += 1
+                continue
+
+            supported = brick.collapse()
+            chain_count += len(supported)
 
     print(f"Part 1: {remove_count}")
     print(f"Part 2: {chain_count}")
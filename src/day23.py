@@ -3,6 +3,8 @@ from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import ClassVar, NamedTuple
 
+from timing import span, timed
+
 
 class Position(NamedTuple):
     """Position Tuple"""
@@ -95,6 +97,7 @@ def hike_part1(
     return count
 
 
+@timed()
 def hike_part2(grid: list[list[str]], start: Position) -> int:
     """Take a hike (Part 2)"""
     target = len(grid) - 1, len(grid[0]) - 2
@@ -152,17 +155,22 @@ def hike_part2(grid: list[list[str]], start: Position) -> int:
     return max_steps + final_steps
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Functions"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        content = f.read()
+    with span("parse"):
+        with open(filename, "r", encoding="utf-8") as f:
+            content = f.read()
 
-    grid = list(map(list, content.splitlines()))
-    mountain_map = MountainMap(grid)
+        grid = list(map(list, content.splitlines()))
+        mountain_map = MountainMap(grid)
 
-    print("Part 1:", hike_part1(mountain_map, mountain_map.start))
+    with span("part1"):
+        steps = hike_part1(mountain_map, mountain_map.start)
+    print("Part 1:", steps)
 
-    print("Part 2:", hike_part2(grid, start=Position(1, 1)))
+    with span("part2"):
+        steps = hike_part2(grid, start=Position(1, 1))
+    print("Part 2:", steps)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ import re
 import numpy as np
 from z3 import IntVector, ModelRef, Solver  # type: ignore
 
+from loader import iter_lines
+from timing import span
+
 
 def part1(hailstones: list[list[int]]) -> int:
     """Part 1"""
@@ -50,17 +53,19 @@ def part2(hailstones: list[list[int]]) -> int:
     return sum(model[v].as_long() for v in (q1, q2, q3))  # type: ignore
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main Function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    with span("parse"):
+        lines = iter_lines(filename)
 
-    hailstones = [list(map(int, re.findall(r"-?\d+", line))) for line in lines]
+        hailstones = [list(map(int, re.findall(r"-?\d+", line))) for line in lines]
 
-    count = part1(hailstones)
+    with span("part1"):
+        count = part1(hailstones)
     print("Part 1:", count)
 
-    result = part2(hailstones)
+    with span("part2"):
+        result = part2(hailstones)
     print("Part 2:", result)
 
 
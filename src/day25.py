@@ -2,27 +2,31 @@
 from math import prod
 import networkx as nx  # type: ignore
 
+from loader import iter_lines
+from timing import span
 
-def main() -> None:
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.read().splitlines()
-
-    nodes: list[str] = []
-    edges: list[tuple[str, str]] = []
-    for line in lines:
-        node, connections = line.split(": ")
-        nodes.append(node)
-        for connection in connections.split(" "):
-            edges.append((node, connection))
-
-    graph = nx.Graph()
-    graph.add_nodes_from(nodes)  # type: ignore
-    graph.add_edges_from(edges)  # type: ignore
-
-    edges_to_remove = list(nx.minimum_edge_cut(graph))  # type: ignore
-    graph.remove_edges_from(edges_to_remove) # type: ignore
-    connected_components = list(nx.connected_components(graph))  # type: ignore
+    with span("parse"):
+        lines = iter_lines(filename)
+
+        nodes: list[str] = []
+        edges: list[tuple[str, str]] = []
+        for line in lines:
+            node, connections = line.split(": ")
+            nodes.append(node)
+            for connection in connections.split(" "):
+                edges.append((node, connection))
+
+        graph = nx.Graph()
+        graph.add_nodes_from(nodes)  # type: ignore
+        graph.add_edges_from(edges)  # type: ignore
+
+    with span("part1"):
+        edges_to_remove = list(nx.minimum_edge_cut(graph))  # type: ignore
+        graph.remove_edges_from(edges_to_remove) # type: ignore
+        connected_components = list(nx.connected_components(graph))  # type: ignore
 
     print("Part 1:", prod(len(component) for component in connected_components)) # type: ignore
 
@@ -1,96 +1,85 @@
 """Day 3: Gear Ratios"""
-from dataclasses import dataclass
-from typing import NamedTuple
-
-
-class Point(NamedTuple):
-    """Point class"""
-    x: int
-    y: int
-
-
-@dataclass
-class Char:
-    """Char class"""
-    value: str
-    adjacent: int = 0
-    ratio: int = 1
-
-    @property
-    def is_gear(self) -> bool:
-        """Return True if char is gear (asterisk))"""
-        return self.adjacent == 2
-
-
-@dataclass
-class Number:
-    """Number class"""
-    value: int = -1
-    index: Point = Point(-1, -1)
-    length: int = 0
-
-    def is_part_number(self, lines: list[list[Char]]) -> bool:
-        """Return True if number is a part number"""
-        start_x = max(self.index.x - 1, 0)
-        end_x = min(self.index.x + self.length, len(lines[0]) - 1)
-        start_y = max(self.index.y - 1, 0)
-        end_y = min(self.index.y + 1, len(lines) - 1)
-        for line in lines[start_y : end_y + 1]:
-            for char in line[start_x : end_x + 1]:
-                if char.value != "*":
-                    continue
-
-                char.adjacent += 1
-                char.ratio *= self.value
-                return True
-        return False
-
-
-def main() -> None:
+from typing import Any
+import numpy as np
+import numpy.typing as npy
+
+from loader import read_grid
+from timing import span
+
+
+Schematic = npy.NDArray[np.uint8]
+Labels = npy.NDArray[np.int32]
+
+
+def label_numbers(schematic: Schematic) -> tuple[Labels, npy.NDArray[np.int64]]:
+    """
+    Labels every digit with the (1-based) index of the number it belongs to,
+    and returns the labels along with the value of each number (indexed by label).
+    """
+    is_digit = (schematic >= ord("0")) & (schematic <= ord("9"))
+    starts = is_digit.copy()
+    starts[:, 1:] &= ~is_digit[:, :-1]
+    labels = np.cumsum(starts, dtype=np.int32).reshape(schematic.shape) * is_digit
+
+    # Digits in row-major order, grouped by the number they belong to
+    digits = schematic[is_digit].astype(np.int64) - ord("0")
+    offsets = np.flatnonzero(starts[is_digit])
+    lengths = np.diff(offsets, append=len(digits))
+    exponents = np.repeat(offsets + lengths, lengths) - 1 - np.arange(len(digits))
+    values = np.zeros(len(offsets) + 1, dtype=np.int64)
+    if len(offsets):
+        values[1:] = np.add.reduceat(digits * 10**exponents, offsets)
+    return labels, values
+
+
+def neighborhoods(array: npy.NDArray[Any]) -> list[npy.NDArray[Any]]:
+    """Returns the 9 views of the array shifted by each offset of a 3x3 window"""
+    height, width = array.shape
+    padded = np.pad(array, 1)
+    return [
+        padded[1 + d_y : 1 + d_y + height, 1 + d_x : 1 + d_x + width]
+        for d_y in (-1, 0, 1)
+        for d_x in (-1, 0, 1)
+    ]
+
+
+def part_numbers_sum(
+    schematic: Schematic, labels: Labels, values: npy.NDArray[np.int64]
+) -> int:
+    """Sums the numbers adjacent to a symbol"""
+    is_symbol = (labels == 0) & (schematic != ord("."))
+    adjacent = np.logical_or.reduce(neighborhoods(is_symbol))
+    part_labels = np.unique(labels[adjacent & (labels != 0)])
+    return int(values[part_labels].sum())
+
+
+def gear_ratios_sum(
+    schematic: Schematic, labels: Labels, values: npy.NDArray[np.int64]
+) -> int:
+    """Sums the gear ratios of the asterisks adjacent to exactly two numbers"""
+    is_star = schematic == ord("*")
+    # Labels around each asterisk, sorted so that repeated labels are contiguous
+    around = np.sort(np.stack([view[is_star] for view in neighborhoods(labels)], 1))
+    is_new = around != 0
+    is_new[:, 1:] &= around[:, 1:] != around[:, :-1]
+    is_gear = np.count_nonzero(is_new, axis=1) == 2
+    ratios = np.where(is_new, values[around], 1).prod(axis=1)
+    return int(ratios[is_gear].sum())
+
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        chars = f.readlines()
-    chars = [[Char(char) for char in line.strip()] for line in chars]
-
-    found_num = False
-    numbers: list[Number] = []
-
-    for y, line in enumerate(chars):
-        number = Number()
-        for x, char in enumerate(line):
-            if not char.value.isdigit():
-                found_num = False
-                if number.value != -1:
-                    numbers.append(number)
-                number = Number()
-                continue
-            if not found_num:
-                found_num = True
-                number.value = int(char.value)
-                number.index = Point(x, y)
-            else:
-                number.value = 10 * number.value + int(char.value)
-            number.length += 1
-        if number.value != -1:
-            numbers.append(number)
-
-    assert all(len(str(num.value)) == num.length for num in numbers)
-    assert all(
-        str(num.value)[0] == chars[num.index.y][num.index.x].value for num in numbers
-    )
-
-    print(*numbers, sep="\n")
-    print(len(numbers))
-
-    part_numbers_sum = sum(
-        number.value for number in numbers if number.is_part_number(chars)
-    )
-    print("Sum:", part_numbers_sum)
-
-    print(
-        "Gear ratios:",
-        sum(char.ratio for line in chars for char in line if char.is_gear),
-    )
+    with span("parse"):
+        schematic = read_grid(filename)
+        labels, values = label_numbers(schematic)
+
+    with span("part1"):
+        part_numbers = part_numbers_sum(schematic, labels, values)
+    print("Sum:", part_numbers)
+
+    with span("part2"):
+        gear_ratios = gear_ratios_sum(schematic, labels, values)
+    print("Gear ratios:", gear_ratios)
 
 
 if __name__ == "__main__":
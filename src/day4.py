@@ -1,34 +1,50 @@
 """Day 4: Scratchcards"""
-import time
+from loader import iter_lines
+from timing import span
 
 
-def main() -> None:
+def to_bitmask(numbers: str) -> int:
+    """Encodes a list of numbers as a bitmask, with bit n set for each number n"""
+    mask = 0
+    for number in numbers.split():
+        mask |= 1 << int(number)
+    return mask
+
+
+def count_matches(card: str) -> int:
+    """Returns how many of the numbers we have are winning numbers"""
+    winning_nums, have_nums = card.split(": ")[1].split(" | ")
+    return (to_bitmask(winning_nums) & to_bitmask(have_nums)).bit_count()
+
+
+def count_scratchcards(matches: list[int]) -> int:
+    """Returns the total number of scratchcards, originals and won copies"""
+    # Copies won are added to a whole range of the following cards at once,
+    # so they are tracked as a difference array over the cards
+    won = [0] * (len(matches) + 1)
+    copies = 0
+    total = 0
+    for i, no_matches in enumerate(matches):
+        copies += won[i]
+        count = 1 + copies
+        total += count
+        won[i + 1] += count
+        won[min(i + 1 + no_matches, len(matches))] -= count
+    return total
+
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    lines = [line.split(": ")[1] for line in lines]
-
-    points = 0
-    scratchcards: list[int] = len(lines) * [1]
-
-    start = time.perf_counter()
-    for i, line in enumerate(lines, 1):
-        nums = line.split(" | ")
-        winning_nums = set(map(int, nums[0].split()))
-        have_nums = set(map(int, nums[1].split()))
-        matches = winning_nums & have_nums
-        no_matches = len(matches)
-        if no_matches > 0:
-            points += 2 ** (no_matches - 1)
-        for _ in range(scratchcards[i - 1]):
-            for j in range(i, i + no_matches):
-                scratchcards[j] += 1
-    end = time.perf_counter()
+    with span("parse"):
+        matches = [count_matches(line) for line in iter_lines(filename)]
 
+    with span("part1"):
+        points = sum(2 ** (no_matches - 1) for no_matches in matches if no_matches)
     print("Points:", points)
-    print("Scratchcards:", sum(scratchcards))
-    print(f"Algorithm took {end - start:.3f}s")
+
+    with span("part2"):
+        scratchcards = count_scratchcards(matches)
+    print("Scratchcards:", scratchcards)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,14 @@
 """Day 5: If You Give a Seed a Fertilizer"""
+from bisect import bisect_right
 from dataclasses import dataclass
+from itertools import islice
+import sys
+
+from timing import span
+
+
+# Upper end of the last (identity) piece of every layer
+UNBOUNDED = sys.maxsize
 
 
 @dataclass
@@ -10,42 +19,104 @@ class Map:
     length: int
 
 
-def main() -> None:
+@dataclass
+class Piece:
+    """Piece of a piecewise-linear function: x -> x + offset, for start <= x < stop"""
+
+    start: int
+    stop: int
+    offset: int
+
+
+Function = list[Piece]  # Disjoint pieces, sorted by start
+
+
+def to_function(maps: list[Map]) -> Function:
+    """Turns a layer of maps into a function, mapping unmapped numbers to themselves"""
+    pieces: Function = []
+    position = 0
+    for to_map in sorted(maps, key=lambda x: x.src_start):
+        if position < to_map.src_start:
+            pieces.append(Piece(position, to_map.src_start, 0))
+        position = to_map.src_start + to_map.length
+        offset = to_map.dest_start - to_map.src_start
+        pieces.append(Piece(to_map.src_start, position, offset))
+    pieces.append(Piece(position, UNBOUNDED, 0))
+    return pieces
+
+
+def compose(inner: Function, outer: Function) -> Function:
+    """Returns the function applying inner first and then outer"""
+    outer_starts = [piece.start for piece in outer]
+    pieces: Function = []
+    for piece in inner:
+        # Split the image of the inner piece by the outer pieces it overlaps
+        start, stop = piece.start + piece.offset, piece.stop + piece.offset
+        first = max(bisect_right(outer_starts, start) - 1, 0)
+        for other in islice(outer, first, None):
+            if other.start >= stop:
+                break
+            pieces.append(
+                Piece(
+                    max(start, other.start) - piece.offset,
+                    min(stop, other.stop) - piece.offset,
+                    piece.offset + other.offset,
+                )
+            )
+    pieces.sort(key=lambda x: x.start)
+    return pieces
+
+
+def lowest_image(function: Function, ranges: list[range]) -> int:
+    """Returns the lowest value the function takes over the given ranges"""
+    starts = [piece.start for piece in function]
+    lowest = UNBOUNDED
+    for r in ranges:
+        # Pieces are increasing, so their lowest value is at their first number
+        first = max(bisect_right(starts, r.start) - 1, 0)
+        for piece in islice(function, first, None):
+            if piece.start >= r.stop:
+                break
+            lowest = min(lowest, max(r.start, piece.start) + piece.offset)
+    return lowest
+
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = [line.strip() for line in f.readlines() if line != "\n"]
-
-    seed_pairs = list(map(int, lines[0].split(": ")[1].split()))
-    ranges = [
-        range(start, start + length) for start, length in zip(*[iter(seed_pairs)] * 2)
-    ]
-
-    list_of_maps: list[list[Map]] = []
-    maps: list[Map] = []
-    for line in lines[2:]:
-        if line.endswith(":"):
-            list_of_maps.append(sorted(maps, key=lambda x: x.src_start))
-            maps.clear()
-            continue
-        dest_start, src_start, length = list(map(int, line.split()))
-        new_map = Map(dest_start, src_start, length)
-        maps.append(new_map)
-    list_of_maps.append(sorted(maps, key=lambda x: x.src_start))
-    list_of_maps.reverse()
-
-    min_location = 0
-    while True:
-        seed = min_location
+    with span("parse"):
+        with open(filename, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f.readlines() if line != "\n"]
+
+        seed_pairs = list(map(int, lines[0].split(": ")[1].split()))
+        ranges = [
+            range(start, start + length) for start, length in zip(*[iter(seed_pairs)] * 2)
+        ]
+
+        list_of_maps: list[list[Map]] = []
+        maps: list[Map] = []
+        for line in lines[2:]:
+            if line.endswith(":"):
+                list_of_maps.append(maps)
+                maps = []
+                continue
+            dest_start, src_start, length = list(map(int, line.split()))
+            new_map = Map(dest_start, src_start, length)
+            maps.append(new_map)
+        list_of_maps.append(maps)
+
+    with span("compose"):
+        seed_to_location = [Piece(0, UNBOUNDED, 0)]
         for maps in list_of_maps:
-            for to_map in maps:
-                if to_map.dest_start <= seed < to_map.dest_start + to_map.length:
-                    seed = to_map.src_start + seed - to_map.dest_start
-                    break
-        if any(seed in r for r in ranges):
-            break
-        min_location += 1
-
-    print("Lowest location:", min_location)
+            seed_to_location = compose(seed_to_location, to_function(maps))
+
+    with span("part1"):
+        seeds = [range(seed, seed + 1) for seed in seed_pairs]
+        min_location = lowest_image(seed_to_location, seeds)
+    print("Lowest location (Part 1):", min_location)
+
+    with span("part2"):
+        min_location = lowest_image(seed_to_location, ranges)
+    print("Lowest location (Part 2):", min_location)
 
 
 if __name__ == "__main__":
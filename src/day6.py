@@ -1,8 +1,15 @@
 """Day 6: Wait For It"""
 from dataclasses import dataclass
 from functools import reduce
+import math
 import operator
 
+from timing import span
+
+
+# Longest race still cross-checked against the naive count
+NAIVE_CHECK_LIMIT = 1000
+
 
 @dataclass
 class Race:
@@ -11,7 +18,29 @@ class Race:
     distance: int
 
     def ways_to_win(self) -> int:
-        """Return number of ways to win"""
+        """Return number of ways to win, in constant time"""
+        # Holding for t ms beats the record when t * (time - t) > distance,
+        # i.e. strictly between the roots of t^2 - time * t + distance = 0
+        discriminant = self.time * self.time - 4 * self.distance
+        if discriminant < 0:
+            return 0
+        lowest = max((self.time - math.isqrt(discriminant)) // 2, 1)
+        # The integer square root is exact up to rounding, so nudge to the boundary
+        while lowest > 1 and self.beats_record(lowest - 1):
+            lowest -= 1
+        while lowest <= self.time // 2 and not self.beats_record(lowest):
+            lowest += 1
+        if lowest > self.time // 2:
+            return 0
+        # Distances are symmetric around time / 2
+        return self.time - 2 * lowest + 1
+
+    def beats_record(self, acc_time: int) -> bool:
+        """Return True if holding the button for acc_time beats the record"""
+        return (self.time - acc_time) * acc_time > self.distance
+
+    def ways_to_win_naive(self) -> int:
+        """Return number of ways to win, trying every acceleration time"""
         num_ways = 0
         for acc_time in range(1, self.time + 1):
             curr_speed = acc_time
@@ -21,9 +50,9 @@ class Race:
         return num_ways
 
 
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
+    with open(filename, "r", encoding="utf-8") as f:
         lines = f.readlines()
 
     times_str = lines[0].split()[1:]
@@ -32,11 +61,19 @@ def main() -> None:
     distances = map(int, distances_str)
 
     races = list(map(Race, times, distances))
-    total = reduce(operator.mul, map(Race.ways_to_win, races))
+    assert all(
+        race.ways_to_win() == race.ways_to_win_naive()
+        for race in races
+        if race.time <= NAIVE_CHECK_LIMIT
+    )
+    with span("part1"):
+        total = reduce(operator.mul, map(Race.ways_to_win, races))
     print("Answer (Part 1):", total)
 
     the_race = Race(int("".join(times_str)), int("".join(distances_str)))
-    print("Answer (Part 2):", the_race.ways_to_win())
+    with span("part2"):
+        ways_to_win = the_race.ways_to_win()
+    print("Answer (Part 2):", ways_to_win)
 
 
 if __name__ == "__main__":
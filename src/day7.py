@@ -1,10 +1,27 @@
 """Day 7: Camel Cards"""
-from collections import Counter
 from dataclasses import dataclass
 from enum import Enum
-from functools import cmp_to_key
+from operator import attrgetter
 from typing import Self
 
+from loader import iter_lines
+from timing import span
+
+
+class Rules(Enum):
+    """Rule sets, with the cards listed by increasing strength"""
+
+    STANDARD = "23456789TJQKA"
+    # Special case: J is a Joker, a wilcard that acts like
+    # whatever card would make the hand the strongest type possible
+    JOKER = "J23456789TQKA"
+
+
+CARD_STRENGTHS = {
+    rules: {card: strength for strength, card in enumerate(rules.value)}
+    for rules in Rules
+}
+
 
 class HandType(Enum):
     """Hand type enum"""
@@ -19,42 +36,27 @@ class HandType(Enum):
     FIVE_OF_A_KIND = 7
 
     @classmethod
-    def from_cards(cls, cards: str) -> Self:
+    def from_cards(cls, cards: str, rules: Rules = Rules.JOKER) -> Self:
         """Return hand type from cards"""
-        counter = Counter(cards)
-
-        # Special case: J is a Joker, a wilcard that acts like
-        # whatever card would make the hand the strongest type possible
-        if counter["J"] not in [0, 5]:
-            most_common_cards = counter.most_common(2)
-            most_common_card = most_common_cards[0][0]
-            if most_common_card == "J":
-                most_common_card = most_common_cards[1][0]
-            cards = cards.replace("J", most_common_card)
-            counter = Counter(cards)
-
-        card_set = set(cards)
-        match len(card_set):
-            case 1:
-                return HandType.FIVE_OF_A_KIND
-            case 2:
-                return (
-                    HandType.FOUR_OF_A_KIND
-                    if any(counter[card] == 4 for card in card_set)
-                    else HandType.FULL_HOUSE
-                )
-            case 3:
-                return (
-                    HandType.THREE_OF_A_KIND
-                    if any(counter[card] == 3 for card in card_set)
-                    else HandType.TWO_PAIR
-                )
-            case 4:
-                return HandType.ONE_PAIR
-            case 5:
-                return HandType.HIGH_CARD
-            case _:
-                return HandType.NONE
+        jokers = cards.count("J") if rules == Rules.JOKER else 0
+        if jokers:
+            cards = cards.replace("J", "")
+        counts = sorted((cards.count(card) for card in set(cards)), reverse=True)
+        counts += [0, 0]
+        # Jokers always join the largest group
+        return TYPES_BY_GROUPS.get((counts[0] + jokers, counts[1]), cls.NONE)
+
+
+# Hand types by the sizes of their two largest groups of equal cards
+TYPES_BY_GROUPS = {
+    (5, 0): HandType.FIVE_OF_A_KIND,
+    (4, 1): HandType.FOUR_OF_A_KIND,
+    (3, 2): HandType.FULL_HOUSE,
+    (3, 1): HandType.THREE_OF_A_KIND,
+    (2, 2): HandType.TWO_PAIR,
+    (2, 1): HandType.ONE_PAIR,
+    (1, 1): HandType.HIGH_CARD,
+}
 
 
 @dataclass
@@ -63,51 +65,39 @@ class Hand:
 
     cards: str
     bid: int
+    rules: Rules = Rules.JOKER
     hand_type: HandType = HandType.NONE
+    key: int = 0
 
     def __post_init__(self) -> None:
-        self.hand_type = HandType.from_cards(self.cards)
-
-
-def compare_to(val1: int, val2: int) -> int:
-    """Compare two values"""
-    if val1 > val2:
-        return 1
-    if val1 < val2:
-        return -1
-    return 0
+        self.hand_type = HandType.from_cards(self.cards, self.rules)
+        # Sort key: the hand type followed by the strength of each card, 4 bits each
+        strengths = CARD_STRENGTHS[self.rules]
+        self.key = self.hand_type.value
+        for card in self.cards:
+            self.key = self.key << 4 | strengths[card]
 
 
-CARDS_BY_STRENGTH = "AKQT98765432J"[::-1]
+def total_winnings(hands: list[Hand]) -> int:
+    """Return the total winnings, with hands ranked by strength"""
+    sorted_hands = sorted(hands, key=attrgetter("key"))
+    return sum(i * hand.bid for i, hand in enumerate(sorted_hands, 1))
 
 
-def compare_hands(hand1: Hand, hand2: Hand) -> int:
-    """Compare two hands"""
-    if hand1.hand_type != hand2.hand_type:
-        return compare_to(hand1.hand_type.value, hand2.hand_type.value)
-
-    for card1, card2 in zip(hand1.cards, hand2.cards):
-        if card1 == card2:
-            continue
-
-        card1_strength = CARDS_BY_STRENGTH.index(card1)
-        card2_strength = CARDS_BY_STRENGTH.index(card2)
-        return compare_to(card1_strength, card2_strength)
-
-    return 0
-
-
-def main() -> None:
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    lines = [line.strip().split() for line in lines]
-    hands = [Hand(line[0], int(line[1])) for line in lines]
-
-    sorted_hands = sorted(hands, key=cmp_to_key(compare_hands))
-    total_winnings = sum(i * hand.bid for i, hand in enumerate(sorted_hands, 1))
-    print("Total winnings (Part 2):", total_winnings)
+    with span("parse"):
+        lines = [line.split() for line in iter_lines(filename)]
+
+    with span("part1"):
+        hands = [Hand(cards, int(bid), Rules.STANDARD) for cards, bid in lines]
+        winnings = total_winnings(hands)
+    print("Total winnings (Part 1):", winnings)
+
+    with span("part2"):
+        hands = [Hand(cards, int(bid), Rules.JOKER) for cards, bid in lines]
+        winnings = total_winnings(hands)
+    print("Total winnings (Part 2):", winnings)
 
 
 if __name__ == "__main__":
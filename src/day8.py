@@ -1,64 +1,175 @@
 """Day 8: Haunted Wasteland"""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import math
+from typing import Iterable, NamedTuple, Self
+import numpy as np
+import numpy.typing as npy
+
+from loader import iter_lines
+from timing import span, timed
+
+
+@dataclass
+class Network:
+    """Network with dense node ids, stored as NumPy successor arrays"""
+
+    names: list[str]
+    successors: npy.NDArray[np.intp]  # Left successors in row 0, right ones in row 1
+    is_z: npy.NDArray[np.bool_]
+    instructions: list[int]  # 0 for "L", 1 for "R"
+    # jumps[k] maps every node to the node reached after 2**k instruction passes
+    jumps: list[npy.NDArray[np.intp]] = field(default_factory=list)
+    # z_hits[node, i] is True if a pass started at the node is on a Z node at step i
+    z_hits: npy.NDArray[np.bool_] = field(
+        default_factory=lambda: np.zeros((0, 0), bool)
+    )
+
+    def __post_init__(self) -> None:
+        # Walk a whole pass from every node at once
+        nodes = np.arange(len(self.names))
+        self.z_hits = np.empty((len(self.names), len(self.instructions)), np.bool_)
+        for i, instruction in enumerate(self.instructions):
+            self.z_hits[:, i] = self.is_z[nodes]
+            nodes = self.successors[instruction, nodes]
+        self.jumps = [nodes]
+
+    @classmethod
+    def from_lines(cls, instructions: list[int], lines: Iterable[str]) -> Self:
+        """Parses the network, numbering the nodes in order of appearance"""
+        edges = []
+        for line in lines:
+            data, jump = line.split(" = ")
+            left, right = jump[1:-1].split(", ")
+            edges.append((data, left, right))
+        names = [data for data, _, _ in edges]
+        ids = {name: idx for idx, name in enumerate(names)}
+        successors = np.array(
+            [
+                [ids[left] for _, left, _ in edges],
+                [ids[right] for _, _, right in edges],
+            ],
+            dtype=np.intp,
+        ).reshape(2, len(names))
+        is_z = np.array([name.endswith("Z") for name in names], dtype=np.bool_)
+        return cls(names, successors, is_z, instructions)
+
+    def advance(self, nodes: npy.NDArray[np.intp], steps: int) -> npy.NDArray[np.intp]:
+        """Moves all the given nodes the same number of steps at once"""
+        passes, rest = divmod(steps, len(self.instructions))
+        # Binary lifting over whole passes, extending the jump tables as needed
+        for k in range(passes.bit_length()):
+            if k == len(self.jumps):
+                self.jumps.append(self.jumps[-1][self.jumps[-1]])
+            if passes >> k & 1:
+                nodes = self.jumps[k][nodes]
+        for instruction in self.instructions[:rest]:
+            nodes = self.successors[instruction, nodes]
+        return nodes
+
+
+class Congruence(NamedTuple):
+    """Congruence x = residue (mod modulus)"""
+
+    residue: int
+    modulus: int
+
+
+def combine(a: Congruence, b: Congruence) -> Congruence | None:
+    """Generalised CRT: solves both congruences at once (moduli need not be coprime)"""
+    gcd = math.gcd(a.modulus, b.modulus)
+    diff = b.residue - a.residue
+    if diff % gcd:
+        return None
+    lcm = a.modulus // gcd * b.modulus
+    k = diff // gcd * pow(a.modulus // gcd, -1, b.modulus // gcd)
+    return Congruence((a.residue + k % (b.modulus // gcd) * a.modulus) % lcm, lcm)
 
 
 @dataclass
-class Node:
-    """Node class"""
-    left: int
-    right: int
-    is_z: bool = False
-
-
-def get_ascii_value(s: str) -> int:
-    """Return ascii value of string"""
-    res = 0
-    for char in s:
-        res = res * 26 + ord(char) - ord("A")
-    return res
-
-
-def no_steps_to_z(node: Node, network: list[Node], instructions: list[int]):
-    """Return number of steps to Z"""
-    steps = 0
-    while True:
-        for instruction in instructions:
-            if node.is_z:
-                return steps
-            if instruction == 0:  # "L"
-                data = node.left
-            else:  # "R"
-                data = node.right
-            node = network[data]
-            steps += 1
-
-
-def main() -> None:
+class Cycle:
+    """Walk of a ghost, which loops once it starts a pass from the same node again"""
+
+    prefix: int  # Steps taken before entering the loop
+    period: int  # Steps taken around the loop
+    z_steps: set[int]  # Steps (before completing the loop once) spent on Z nodes
+
+    def is_z_step(self, step: int) -> bool:
+        """Return True if the ghost is on a Z node after the given number of steps"""
+        if step >= self.prefix:
+            step = self.prefix + (step - self.prefix) % self.period
+        return step in self.z_steps
+
+    def congruences(self) -> list[Congruence]:
+        """Return the steps on Z nodes inside the loop, as congruences"""
+        return [
+            Congruence(step % self.period, self.period)
+            for step in self.z_steps
+            if step >= self.prefix
+        ]
+
+
+@timed()
+def find_cycle(node: int, network: Network) -> Cycle:
+    """Walk from the given node, a whole pass at a time, until a node repeats"""
+    length = len(network.instructions)
+    pass_end = network.jumps[0]
+    first_seen: dict[int, int] = {}
+    z_steps: set[int] = set()
+    passes = 0
+    while node not in first_seen:
+        first_seen[node] = passes
+        z_steps.update(
+            (passes * length + np.flatnonzero(network.z_hits[node])).tolist()
+        )
+        node = int(pass_end[node])
+        passes += 1
+    prefix = first_seen[node] * length
+    return Cycle(prefix, passes * length - prefix, z_steps)
+
+
+@timed()
+def first_joint_arrival(cycles: list[Cycle]) -> int:
+    """Return the first step at which every ghost is on a Z node"""
+    # Until every ghost is looping, candidates are the early Z steps of the
+    # ghost with the longest prefix
+    looping = max(cycles, key=lambda cycle: cycle.prefix)
+    for step in sorted(step for step in looping.z_steps if step < looping.prefix):
+        if all(cycle.is_z_step(step) for cycle in cycles):
+            return step
+
+    # Afterwards, the steps must satisfy one congruence of every ghost
+    solutions = [Congruence(0, 1)]
+    for cycle in cycles:
+        solutions = list(
+            {
+                solution
+                for previous in solutions
+                for congruence in cycle.congruences()
+                if (solution := combine(previous, congruence)) is not None
+            }
+        )
+    if not solutions:
+        raise ValueError("Ghosts never meet on Z nodes")
+    return min(
+        looping.prefix + (residue - looping.prefix) % modulus
+        for residue, modulus in solutions
+    )
+
+
+def main(filename: str = "input.txt") -> None:
     """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = list(map(str.strip, f.readlines()))
-
-    instructions = [0 if char == "L" else 1 for char in lines[0]]
-
-    network: list[Node] = 26**3 * [None]  # type: ignore
-    nodes_end_with_a: list[Node] = []
-
-    first_node = None
-    for line in lines[2:]:
-        data, jump = line.split(" = ")
-        left, right = jump[1:-1].split(", ")
-        idx = get_ascii_value(data)
-        network[idx] = Node(get_ascii_value(left), get_ascii_value(right))
-        if first_node is None:
-            first_node = network[idx]
-        if data.endswith("A"):
-            nodes_end_with_a.append(network[idx])
-        if data.endswith("Z"):
-            network[idx].is_z = True
-
-    steps = [no_steps_to_z(node, network, instructions) for node in nodes_end_with_a]
-    min_steps = math.lcm(*steps)
+    with span("parse"):
+        lines = iter_lines(filename)
+        instructions = [0 if char == "L" else 1 for char in next(lines).strip()]
+        next(lines)  # Skip the blank line
+
+        network = Network.from_lines(instructions, lines)
+
+    with span("part2"):
+        starts = [idx for idx, name in enumerate(network.names) if name.endswith("A")]
+        cycles = [find_cycle(node, network) for node in starts]
+        min_steps = first_joint_arrival(cycles)
+        assert network.is_z[network.advance(np.array(starts), min_steps)].all()
     print("Number of steps:", min_steps)
 
 
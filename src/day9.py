@@ -1,32 +1,75 @@
 """Day 9: Mirage Maintenance"""
+import math
+import numpy as np
+import numpy.typing as npy
 
+from loader import iter_lines
+from timing import span
 
-def compute_next_element(sequence: list[int]) -> int:
-    """Return the next element in the sequence"""
-    next_element = 0
-    while True:
-        if all(el == 0 for el in sequence):
-            break
-        next_element += sequence[-1]
-        sequence = [b - a for a, b in zip(sequence, sequence[1:])]
-    return next_element
+Histories = npy.NDArray[np.int64]  # One history per row, all of the same length
 
 
-def main() -> None:
-    """Main function"""
-    with open("input.txt", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+def extrapolation_weights(length: int, steps: int = 1) -> list[int]:
+    """
+    Returns the weights giving the value the given number of steps after the end
+    of a history, i.e. the Lagrange weights of its polynomial of degree length - 1
+    (which is what repeatedly taking differences until they are all zero finds).
+    """
+    if steps < 1:
+        raise ValueError("Can only extrapolate at least one step ahead")
+    end = length - 1 + steps
+    return [
+        (-1) ** (length - 1 - i)
+        * math.comb(end, i)
+        * math.comb(end - i - 1, length - 1 - i)
+        for i in range(length)
+    ]
+
+
+def extrapolate(histories: Histories, steps: int = 1) -> npy.NDArray[np.int64]:
+    """Returns the values the given number of steps after and before every history"""
+    weights = extrapolation_weights(histories.shape[1], steps)
+    # Going backwards is going forwards through the reversed histories
+    matrix = np.array([weights, weights[::-1]]).T
+    bound = sum(map(abs, weights)) * int(np.abs(histories).max(initial=0))
+    if bound >= 2**63:
+        # Exact, if much slower, arithmetic on Python integers
+        return histories.astype(object) @ matrix.astype(object)
+    return histories @ matrix.astype(np.int64)
+
 
-    histories = [list(map(int, line.split())) for line in lines]
+def sum_extrapolated(batches: list[Histories], steps: int = 1) -> tuple[int, int]:
+    """Returns the sums of the values after and before every history"""
+    forward = backward = 0
+    for batch in batches:
+        values = extrapolate(batch, steps)
+        # Every value fits, but their sum might not
+        largest = int(np.abs(values).max(initial=0))
+        if values.dtype != object and len(values) * largest >= 2**63:
+            values = values.astype(object)
+        after, before = values.sum(axis=0)
+        forward, backward = forward + int(after), backward + int(before)
+    return forward, backward
 
-    next_element_sum = sum(map(compute_next_element, histories))
-    print("Sum (Part 1):", next_element_sum)
 
-    for history in histories:
-        history.reverse()
+def load_histories(filename: str) -> list[Histories]:
+    """Loads the histories, batched by length"""
+    batches: dict[int, list[list[int]]] = {}
+    for line in iter_lines(filename):
+        history = list(map(int, line.split()))
+        batches.setdefault(len(history), []).append(history)
+    return [np.array(batch, dtype=np.int64) for batch in batches.values()]
+
+
+def main(filename: str = "input.txt") -> None:
+    """Main function"""
+    with span("parse"):
+        batches = load_histories(filename)
 
-    next_element_sum = sum(map(compute_next_element, histories))
-    print("Sum (Part 2 ):", next_element_sum)
+    with span("extrapolate"):
+        sums = sum_extrapolated(batches)
+    print("Sum (Part 1):", sums[0])
+    print("Sum (Part 2 ):", sums[1])
 
 
 if __name__ == "__main__":
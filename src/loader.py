@@ -0,0 +1,65 @@
+"""Memory-mapped input loading"""
+from contextlib import contextmanager, nullcontext
+import mmap
+import os
+from typing import BinaryIO, ContextManager, Iterator
+import numpy as np
+import numpy.typing as npy
+
+Buffer = bytes | mmap.mmap
+
+
+def map_file(f: BinaryIO) -> ContextManager[Buffer]:
+    """Memory-maps the open file (read-only), standing in b"" if it is empty"""
+    if os.fstat(f.fileno()).st_size == 0:  # Empty files cannot be mapped
+        return nullcontext(b"")
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextmanager
+def map_input(filename: str) -> Iterator[Buffer]:
+    """Memory-maps the input file (read-only) for the duration of the block"""
+    with open(filename, "rb") as f, map_file(f) as buffer:
+        yield buffer
+
+
+def iter_byte_lines(filename: str) -> Iterator[bytes]:
+    """Lazily yields the lines of the input file, without line terminators"""
+    with open(filename, "rb") as f, map_file(f) as buffer:
+        if isinstance(buffer, mmap.mmap):
+            for line in iter(buffer.readline, b""):
+                yield line.rstrip(b"\r\n")
+
+
+def iter_lines(filename: str) -> Iterator[str]:
+    """Lazily yields the decoded lines of the input file"""
+    for line in iter_byte_lines(filename):
+        yield line.decode()
+
+
+def iter_fields(
+    filename: str, separator: bytes = b",", chunk_size: int = 1 << 16
+) -> Iterator[bytes]:
+    """Lazily yields the separated fields of the input file, ignoring line breaks"""
+    with open(filename, "rb") as f:
+        rest = b""
+        while chunk := f.read(chunk_size):
+            fields = (rest + chunk).translate(None, b"\r\n").split(separator)
+            rest = fields.pop()  # May continue in the next chunk
+            yield from fields
+        if rest:
+            yield rest
+
+
+def read_grid(filename: str) -> npy.NDArray[np.uint8]:
+    """Reads a rectangular grid of characters into a 2-D byte array"""
+    with map_input(filename) as data:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        width = data.find(b"\n")
+        if width == -1:
+            width = len(buffer)
+        if len(buffer) % (width + 1):  # No line terminator after the last row
+            buffer = np.append(buffer, np.uint8(ord("\n")))
+        grid = buffer.reshape(-1, width + 1)[:, :width].copy()
+        del buffer  # Release the mapped memory before it is closed
+    return grid
@@ -0,0 +1,170 @@
+"""Benchmark runner for the daily solutions"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+import importlib
+import io
+import json
+import math
+import os
+import statistics
+import time
+
+import timing
+
+
+DAYS = range(1, 26)
+
+# Historically slowest days, slowest first
+SLOWEST_DAYS = (16, 23, 12, 14, 21)
+
+
+@dataclass
+class Benchmark:
+    """Wall times (in seconds) and spans collected for a single day"""
+
+    day: int
+    total: list[float] = field(default_factory=list)
+    spans: dict[str, list[timing.Span]] = field(default_factory=dict)
+    output: str = ""
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of the given samples"""
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def run_day(day: int, filename: str, warmup: int = 1, repeat: int = 5) -> Benchmark:
+    """Runs a day's solution several times and collects its timings and output"""
+    module = importlib.import_module(f"day{day}")
+    benchmark = Benchmark(day)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for i in range(warmup + repeat):
+            # Only the output of the last run is kept
+            stdout = io.StringIO() if i == warmup + repeat - 1 else devnull
+            with redirect_stdout(stdout), timing.record() as recorder:
+                start = time.perf_counter()
+                module.main(filename)
+                elapsed = time.perf_counter() - start
+            if isinstance(stdout, io.StringIO):
+                benchmark.output = stdout.getvalue()
+            if i < warmup:
+                continue
+            benchmark.total.append(elapsed)
+            for name, span in recorder.spans.items():
+                benchmark.spans.setdefault(name, []).append(span)
+    return benchmark
+
+
+def schedule(days: list[int]) -> list[int]:
+    """Orders the days longest-first, so that the slowest ones start right away"""
+
+    def rank(day: int) -> int:
+        if day in SLOWEST_DAYS:
+            return SLOWEST_DAYS.index(day)
+        return len(SLOWEST_DAYS)
+
+    return sorted(days, key=rank)
+
+
+def run_parallel(
+    days: list[int], input_pattern: str, warmup: int, repeat: int, jobs: int | None
+) -> list[Benchmark]:
+    """Runs every day in its own worker process, returning results in day order"""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            day: executor.submit(
+                run_day, day, input_pattern.format(day=day), warmup, repeat
+            )
+            for day in schedule(days)
+        }
+        return [futures[day].result() for day in days]
+
+
+def format_row(label: str, samples: list[float], calls: int | None = None) -> str:
+    """Formats min/median/p95 of the samples (in milliseconds) as a table row"""
+    stats = min(samples), statistics.median(samples), percentile(samples, 95)
+    row = f"{label:<28}" + "".join(f"{1000 * stat:>12.3f}" for stat in stats)
+    return row if calls is None else f"{row}{calls:>10}"
+
+
+def report(benchmarks: list[Benchmark], show_output: bool = False) -> None:
+    """Prints a timing table (and optionally the output) of the given benchmarks"""
+    header = f"{'':<28}{'min (ms)':>12}{'median (ms)':>12}{'p95 (ms)':>12}{'calls':>10}"
+    print(header)
+    for benchmark in benchmarks:
+        print(format_row(f"Day {benchmark.day}", benchmark.total))
+        for path, spans in benchmark.spans.items():
+            *parents, name = path.split("/")
+            label = "  " * (len(parents) + 1) + name
+            samples = [span.total_ns / 1e9 for span in spans]
+            print(format_row(label, samples, spans[-1].calls))
+        if show_output:
+            print(benchmark.output, end="")
+
+
+def parse_days(values: list[str]) -> list[int]:
+    """Parses day numbers and ranges (e.g. '4' or '12-16')"""
+    if not values:
+        return list(DAYS)
+    days: list[int] = []
+    for value in values:
+        first, _, last = value.partition("-")
+        days.extend(range(int(first), int(last or first) + 1))
+    return days
+
+
+def main() -> None:
+    """Main Function"""
+    parser = argparse.ArgumentParser(description="Benchmark the daily solutions")
+    parser.add_argument(
+        "days", nargs="*", help="days to run, e.g. 4 or 12-16 (default: all)"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="input.txt",
+        help="input file; '{day}' is replaced by the day number",
+    )
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="warmup runs")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed runs")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of days to run in parallel; 0 uses every core (default: 1)",
+    )
+    parser.add_argument(
+        "-o", "--show-output", action="store_true", help="print each day's output"
+    )
+    parser.add_argument("--json", help="also write the collected timings to this file")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    days = parse_days(args.days)
+    start = time.perf_counter()
+    if args.jobs == 1:
+        benchmarks = [
+            run_day(day, args.input.format(day=day), args.warmup, args.repeat)
+            for day in days
+        ]
+    else:
+        benchmarks = run_parallel(
+            days, args.input, args.warmup, args.repeat, args.jobs or None
+        )
+    elapsed = time.perf_counter() - start
+    report(benchmarks, args.show_output)
+    print(f"Total wall time: {elapsed:.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(benchmark) for benchmark in benchmarks], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Lightweight instrumentation of the solutions' phases
+
+Spans are only recorded while a recorder is active (see `record`), so the hooks
+cost next to nothing otherwise. Setting the AOC_TRACE environment variable to a
+file name records every span of the run and dumps them there as JSON on exit.
+"""
+import atexit
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+import json
+import os
+import time
+from typing import Callable, Iterator, ParamSpec, TypeVar
+
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class Span:
+    """Accumulated timing of a named span"""
+
+    calls: int = 0
+    total_ns: int = 0
+
+
+@dataclass
+class Recorder:
+    """Collects spans, keyed by their '/'-separated path"""
+
+    spans: dict[str, Span] = field(default_factory=dict)
+    stack: list[str] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        """Returns the recorded spans as JSON"""
+        return json.dumps({name: asdict(s) for name, s in self.spans.items()}, indent=2)
+
+    def dump(self, filename: str) -> None:
+        """Writes the recorded spans to a JSON file"""
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+
+_recorders: list[Recorder] = []
+
+
+@contextmanager
+def record() -> Iterator[Recorder]:
+    """Records every span entered inside the block"""
+    recorder = Recorder()
+    _recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorders.remove(recorder)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the enclosed block as a span nested in the current one, if recording"""
+    if not _recorders:
+        yield
+        return
+    recorder = _recorders[-1]
+    if recorder.stack and recorder.stack[-1] == name:
+        # Recursive call: already timed by the outermost call, only count it
+        recorder.spans["/".join(recorder.stack)].calls += 1
+        yield
+        return
+    recorder.stack.append(name)
+    entry = recorder.spans.setdefault("/".join(recorder.stack), Span())
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        entry.total_ns += time.perf_counter_ns() - start
+        entry.calls += 1
+        recorder.stack.pop()
+
+
+def timed(name: str | None = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator recording every call to the function as a span"""
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not _recorders:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+if trace_file := os.environ.get("AOC_TRACE"):
+    _trace = Recorder()
+    _recorders.append(_trace)
+    atexit.register(_trace.dump, trace_file)